@@ -0,0 +1,394 @@
+"""
+Benchmarks of the CRUD and router layers on SQLite (sync) and aiosqlite (async),
+in-process and through the ASGI app with httpx.
+
+    sh scripts/bench.sh                    # run, compare with benchmarks/baseline.json
+    sh scripts/bench.sh --save-baseline    # store the results as the new baseline
+    sh scripts/bench.sh --filter http --scale 0.2
+
+The baseline is only meaningful on the machine it was recorded on.
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from fastapi import APIRouter, FastAPI
+from httpx import ASGITransport, AsyncClient
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import TIMESTAMP, Column, Integer, String, func, select, text
+
+from fastapi_easy_crud.crud.async_crud_base import AsyncCRUDBase
+from fastapi_easy_crud.crud.async_restful_api_base import AsyncBaseAPI
+from fastapi_easy_crud.crud.crud_base import CRUDBase
+from fastapi_easy_crud.crud.restful_api_base import BaseAPI
+from fastapi_easy_crud.db import settings
+from fastapi_easy_crud.db.async_db_deps import get_async_session_maker
+from fastapi_easy_crud.db.db_base import CommonBase
+from fastapi_easy_crud.db.engine import dispose_engines, get_engine
+from fastapi_easy_crud.db.session import SessionLocal
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+Operation = Callable[[], Union[Any, Awaitable[Any]]]
+
+# sessions used by the cases, closed before the engines are disposed
+sessions: List[Any] = []
+
+
+class BenchItem(CommonBase):
+    name = Column(String(64), index=True)
+    qty = Column(Integer)
+    # SQLite has no ON UPDATE CURRENT_TIMESTAMP
+    last_modified_time = Column(
+        TIMESTAMP, nullable=False, server_default=text("CURRENT_TIMESTAMP")
+    )
+
+
+class BenchItemGet(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    name: Optional[str] = None
+    qty: Optional[int] = None
+
+
+class BenchItemCreate(BaseModel):
+    name: Optional[str] = None
+    qty: Optional[int] = None
+
+
+class BenchItemUpdate(BenchItemCreate):
+    pass
+
+
+crud = CRUDBase(BenchItem)
+async_crud = AsyncCRUDBase(BenchItem)
+api = BaseAPI("/sync", ["sync"], crud, BenchItemGet, BenchItemCreate, BenchItemUpdate)
+async_api = AsyncBaseAPI(
+    "/async", ["async"], async_crud, BenchItemGet, BenchItemCreate, BenchItemUpdate
+)
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+    for base_api in (api, async_api):
+        router = APIRouter(prefix=base_api.prefix, tags=base_api.tags)
+        base_api.init_router(router)
+        app.include_router(router)
+    return app
+
+
+def new_objs(n: int) -> List[BenchItemCreate]:
+    return [BenchItemCreate(name=f"item-{i}", qty=i) for i in range(n)]
+
+
+def last_ids(n: int) -> List[int]:
+    with SessionLocal() as db:
+        max_id = db.scalar(select(func.max(BenchItem.id))) or 0
+    return list(range(max_id - n + 1, max_id + 1))
+
+
+def seed(n: int) -> List[int]:
+    with SessionLocal() as db:
+        crud.batch_create_silently(db, objs=new_objs(n))
+    return last_ids(n)
+
+
+class Case:
+    def __init__(
+        self,
+        name: str,
+        iterations: int,
+        make_operation: Callable[[int], Operation],
+    ) -> None:
+        self.name = name
+        self.iterations = iterations
+        # called with the iteration count before timing, returns the operation
+        self.make_operation = make_operation
+
+
+async def call(operation: Operation) -> None:
+    result = operation()
+    if inspect.isawaitable(result):
+        await result
+
+
+async def run_case(case: Case, scale: float) -> Dict[str, float]:
+    iterations = max(3, int(case.iterations * scale))
+    warmup = max(1, iterations // 10)
+    operation = case.make_operation(warmup + iterations * 2)
+    for _ in range(warmup):
+        await call(operation)
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        op_start = time.perf_counter()
+        await call(operation)
+        latencies.append(time.perf_counter() - op_start)
+    total = time.perf_counter() - start
+
+    # separate pass, tracing slows every allocation down
+    tracemalloc.start()
+    peak = 0
+    for _ in range(iterations):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        await call(operation)
+        peak += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "ops_per_sec": iterations / total,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "alloc_kib": peak / iterations / 1024,
+    }
+
+
+def crud_cases(seed_ids: List[int]) -> List[Case]:
+    db = SessionLocal()
+    sessions.append(db)
+    batch_ids = seed_ids[:1000]
+
+    def cycle(ids: List[int]) -> Callable[[], int]:
+        it = iter(ids * 1000)
+        return lambda: next(it)
+
+    def get(n: int) -> Operation:
+        next_id = cycle(seed_ids)
+        return lambda: crud.get(db, next_id())
+
+    def update_by_id(n: int) -> Operation:
+        next_id = cycle(seed_ids)
+        return lambda: crud.update_by_id(db, id=next_id(), obj_in={"qty": 1})
+
+    def remove(n: int) -> Operation:
+        next_id = iter(seed(n)).__next__
+        return lambda: crud.remove(db, id=next_id())
+
+    return [
+        Case("crud.get", 2000, get),
+        Case(
+            "crud.batch_get_1k", 50, lambda n: lambda: crud.batch_get(db, ids=batch_ids)
+        ),
+        Case(
+            "crud.batch_get_rows_1k",
+            50,
+            lambda n: lambda: crud.batch_get_rows(db, ids=batch_ids),
+        ),
+        Case(
+            "crud.get_multi_100", 500, lambda n: lambda: crud.get_multi(db, limit=100)
+        ),
+        Case(
+            "crud.create", 500, lambda n: lambda: crud.create(db, obj_in=new_objs(1)[0])
+        ),
+        Case(
+            "crud.batch_create_silently_10k",
+            5,
+            lambda n: lambda: crud.batch_create_silently(db, objs=new_objs(10000)),
+        ),
+        Case("crud.update_by_id", 500, update_by_id),
+        Case("crud.remove", 500, remove),
+        Case(
+            "api.to_models_1k",
+            50,
+            lambda n: lambda: api.to_models(crud.batch_get(db, ids=batch_ids)),
+        ),
+    ]
+
+
+def async_crud_cases(seed_ids: List[int]) -> List[Case]:
+    db = get_async_session_maker()()
+    sessions.append(db)
+    batch_ids = seed_ids[:1000]
+
+    def cycle(ids: List[int]) -> Callable[[], int]:
+        it = iter(ids * 1000)
+        return lambda: next(it)
+
+    def get(n: int) -> Operation:
+        next_id = cycle(seed_ids)
+        return lambda: async_crud.get(db, id=next_id())
+
+    def update_by_id(n: int) -> Operation:
+        next_id = cycle(seed_ids)
+        return lambda: async_crud.update_by_id(db, id=next_id(), obj_in={"qty": 1})
+
+    def remove(n: int) -> Operation:
+        next_id = iter(seed(n)).__next__
+        return lambda: async_crud.remove(db, id=next_id())
+
+    return [
+        Case("async_crud.get", 2000, get),
+        Case(
+            "async_crud.batch_get_1k",
+            50,
+            lambda n: lambda: async_crud.batch_get(db, ids=batch_ids),
+        ),
+        Case(
+            "async_crud.batch_get_rows_1k",
+            50,
+            lambda n: lambda: async_crud.batch_get_rows(db, ids=batch_ids),
+        ),
+        Case(
+            "async_crud.get_multi_100",
+            500,
+            lambda n: lambda: async_crud.get_multi(db, limit=100),
+        ),
+        Case(
+            "async_crud.create",
+            500,
+            lambda n: lambda: async_crud.create(db, obj_in=new_objs(1)[0]),
+        ),
+        Case(
+            "async_crud.batch_create_silently_10k",
+            5,
+            lambda n: lambda: async_crud.batch_create_silently(
+                db, objs=new_objs(10000)
+            ),
+        ),
+        Case("async_crud.update_by_id", 500, update_by_id),
+        Case("async_crud.remove", 500, remove),
+    ]
+
+
+def http_cases(client: AsyncClient, prefix: str, seed_ids: List[int]) -> List[Case]:
+    batch_params = {"ids": seed_ids[:1000]}
+    rows_10k = [{"name": f"item-{i}", "qty": i} for i in range(10000)]
+
+    async def request(method: str, url: str, **kwargs: Any) -> None:
+        response = await client.request(method, f"{prefix}{url}", **kwargs)
+        response.raise_for_status()
+
+    def get(n: int) -> Operation:
+        it = iter(seed_ids * 1000)
+        return lambda: request("GET", "/get", params={"id": next(it)})
+
+    def update_by_id(n: int) -> Operation:
+        it = iter(seed_ids * 1000)
+        return lambda: request(
+            "PUT", "/update_by_id", params={"id": next(it)}, json={"qty": 1}
+        )
+
+    def remove(n: int) -> Operation:
+        it = iter(seed(n))
+        return lambda: request("DELETE", "/delete", params={"id": next(it)})
+
+    name = f"http{prefix}"
+    return [
+        Case(f"{name}/get", 1000, get),
+        Case(
+            f"{name}/batch_get_1k",
+            30,
+            lambda n: lambda: request("GET", "/batch_get", params=batch_params),
+        ),
+        Case(
+            f"{name}/all_100",
+            300,
+            lambda n: lambda: request("GET", "/all", params={"limit": 100}),
+        ),
+        Case(
+            f"{name}/create",
+            300,
+            lambda n: lambda: request("POST", "/create", json={"name": "x"}),
+        ),
+        Case(
+            f"{name}/batch_create_silently_10k",
+            3,
+            lambda n: lambda: request("POST", "/batch_create_silently", json=rows_10k),
+        ),
+        Case(f"{name}/update_by_id", 300, update_by_id),
+        Case(f"{name}/delete", 300, remove),
+    ]
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float,
+) -> List[str]:
+    """Print the results next to the baseline, return the regressed cases."""
+    regressions = []
+    print(
+        f"{'case':<42}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+        f"{'KiB/op':>10}{'p50 vs base':>13}"
+    )
+    for name, result in results.items():
+        delta = ""
+        base = baseline.get(name)
+        if base:
+            change = result["p50_ms"] / base["p50_ms"] - 1
+            delta = f"{change:+.1%}"
+            if change > threshold:
+                regressions.append(name)
+                delta += " !"
+        print(
+            f"{name:<42}{result['ops_per_sec']:>10.1f}{result['p50_ms']:>10.3f}"
+            f"{result['p99_ms']:>10.3f}{result['alloc_kib']:>10.1f}{delta:>13}"
+        )
+    return regressions
+
+
+async def main(args: argparse.Namespace) -> int:
+    directory = tempfile.mkdtemp(prefix="fastapi_easy_crud_bench_")
+    # the engine url is formatted with the password
+    settings.init(f"sqlite:///{directory}/bench%s.db", "_")
+    CommonBase.metadata.create_all(get_engine())
+    seed_ids = seed(5000)
+    # the sync engine is built, the async one will use aiosqlite on the same file
+    settings.settings.sqlalchemy_engine = f"sqlite+aiosqlite:///{directory}/bench%s.db"
+
+    client = AsyncClient(
+        transport=ASGITransport(app=create_app()), base_url="http://bench"
+    )
+    cases = (
+        crud_cases(seed_ids)
+        + async_crud_cases(seed_ids)
+        + http_cases(client, "/sync", seed_ids)
+        + http_cases(client, "/async", seed_ids)
+    )
+    results = {}
+    try:
+        for case in cases:
+            if args.filter and args.filter not in case.name:
+                continue
+            results[case.name] = await run_case(case, args.scale)
+    finally:
+        await client.aclose()
+        for db in sessions:
+            await call(db.close)
+        await dispose_engines()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({**baseline, **results}, f, indent=2, sort_keys=True)
+        print(f"baseline saved to {args.baseline}")
+    elif regressions:
+        print(f"p50 regressed by more than {args.threshold:.0%}: {regressions}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--filter", help="only run cases containing this string")
+    parser.add_argument("--scale", type=float, default=1.0, help="iteration factor")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="tolerated p50 slowdown"
+    )
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -1,20 +1,76 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+import asyncio
+from typing import (Any, AsyncIterator, Dict, FrozenSet, Generic, Iterable,
+                    List, Optional, Sequence, Tuple, Type, TypeVar, Union)
 
-from fastapi.encoders import jsonable_encoder
 from loguru import logger
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import delete, insert, inspect, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
+from fastapi_easy_crud.crud.cache import EntityCache
+from fastapi_easy_crud.crud.conditional import version_columns
+from fastapi_easy_crud.crud.pagination import keyset_select, to_page
+from fastapi_easy_crud.crud.query import QuerySpec, compile_query_spec
+from fastapi_easy_crud.crud.rows import to_rows
+from fastapi_easy_crud.crud.statements import (batch_method, dialect_name,
+                                               ids_params, select_all,
+                                               select_by_id, select_by_ids,
+                                               select_rows, select_rows_by_ids,
+                                               select_versions_by_ids)
+from fastapi_easy_crud.crud.utils import (chunked, column_names, encode_model,
+                                          group_by_keys, indexed_column_names,
+                                          load_only_columns, order_by_ids,
+                                          select_by_keys,
+                                          supports_delete_returning,
+                                          supports_executemany_returning,
+                                          supports_insert_returning,
+                                          supports_update_returning,
+                                          unique_ids, upsert_statement,
+                                          upsert_update_columns)
 from fastapi_easy_crud.db.db_base import CommonBase as Base
+from fastapi_easy_crud.db.routing import (USE_PRIMARY, RoutingSession,
+                                          use_primary)
+from fastapi_easy_crud.db.transaction import after_commit, in_transaction
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+def _can_fan_out(db: AsyncSession) -> bool:
+    """
+    Whether other connections see what `db` sees: not inside a `transaction`
+    scope, without unflushed changes and not stuck to the primary after a write.
+    """
+    return (
+        db.bind is not None
+        and not in_transaction(db)
+        and not (db.new or db.dirty or db.deleted)
+        and not db.sync_session.info.get(USE_PRIMARY)
+    )
+
+
+def _chunk_session(db: AsyncSession) -> AsyncSession:
+    sync_session = db.sync_session
+    if isinstance(sync_session, RoutingSession):
+        return AsyncSession(
+            db.bind,
+            sync_session_class=RoutingSession,
+            replicas=sync_session.replicas,
+        )
+    return AsyncSession(db.bind)
+
+
 class AsyncCRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
-    def __init__(self, model: Type[ModelType]):
+    def __init__(
+        self,
+        model: Type[ModelType],
+        batch_size: int = 1000,
+        cache: Optional[EntityCache] = None,
+        filterable_fields: Optional[List[str]] = None,
+        max_concurrency: int = 4,
+    ):
         """
         CRUD object with default methods to Create, Read, Update, Delete (CRUD).
 
@@ -22,43 +78,316 @@ class AsyncCRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 
         * `model`: A SQLAlchemy model class
         * `schema`: A Pydantic model (schema) class
+        * `batch_size`: Max rows sent per statement by the batch methods
+        * `cache`: Optional read-through cache for get / batch_get
+        * `filterable_fields`: Columns get_multi may filter / sort on, defaults to the indexed ones
+        * `max_concurrency`: Max concurrent queries, each on its own pooled connection, of one batch_get
         """  # noqa
         self.model = model
+        self.batch_size = batch_size
+        self.cache = cache
+        self._filterable_fields_arg = filterable_fields
+        self._filterable_fields: Optional[FrozenSet[str]] = None
+        self.max_concurrency = max_concurrency
 
-    async def get(self, db: AsyncSession, *, id: Any) -> Optional[ModelType]:
-        result = await db.execute(select(self.model).where(self.model.id == id))
+    async def get(
+        self, db: AsyncSession, *, id: Any, fields: Optional[List[str]] = None
+    ) -> Optional[ModelType]:
+        if self._use_cache(db, fields):
+            db_objs = await self.batch_get(db, ids=[id])
+            return db_objs[0] if db_objs else None
+        stmt = self._with_fields(select_by_id(self.model), fields)
+        result = await db.execute(stmt, {"id": id})
         return result.scalar()
 
-    async def batch_get(self, db: AsyncSession, *, ids: List[Any]) -> List[ModelType]:
-        result = await db.execute(select(self.model).where(self.model.id.in_(ids)))
-        return list(result.scalars().all())
+    async def batch_get(
+        self, db: AsyncSession, *, ids: List[Any], fields: Optional[List[str]] = None
+    ) -> List[ModelType]:
+        """
+        Rows of `ids` in the order of `ids`, without duplicates. Large id lists
+        are sent `batch_size` ids per query, up to `max_concurrency` queries at
+        a time on their own pooled connections.
+        """
+        ids = unique_ids(ids)
+        if not self._use_cache(db, fields):
+            return order_by_ids(ids, await self._fetch_by_ids(db, ids, fields))
+        cached = self.cache.get_many(self.model, ids)
+        db_objs = [await self._from_cache(db, data) for data in cached.values()]
+        missing = [id for id in ids if str(id) not in cached]
+        if missing:
+            fetched = await self._fetch_by_ids(db, missing, None)
+            self.cache.set_many(self.model, fetched)
+            db_objs.extend(fetched)
+        return order_by_ids(ids, db_objs)
+
+    @batch_method
+    async def _fetch_by_ids(
+        self, db: AsyncSession, ids: List[Any], fields: Optional[List[str]]
+    ) -> List[ModelType]:
+        stmt = self._with_fields(select_by_ids(self.model, dialect_name(db)), fields)
+        chunks = [list(chunk) for chunk in chunked(ids, self.batch_size)]
+        if len(chunks) < 2 or self.max_concurrency < 2 or not _can_fan_out(db):
+            db_objs: List[ModelType] = []
+            for chunk in chunks:
+                result = await db.execute(stmt, ids_params(dialect_name(db), chunk))
+                db_objs.extend(result.scalars().all())
+            return db_objs
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(chunk: List[Any]) -> List[ModelType]:
+            # an AsyncSession runs one query at a time, each chunk gets its own
+            async with semaphore, _chunk_session(db) as chunk_db:
+                params = ids_params(dialect_name(db), chunk)
+                result = await chunk_db.execute(stmt, params)
+                return list(result.scalars().all())
+
+        results = await asyncio.gather(*(fetch(chunk) for chunk in chunks))
+        # the chunk sessions are closed, attach their rows to `db`, refreshing
+        # the instances it already holds like a query on `db` would have
+        identity_map = db.sync_session.identity_map
+        db_objs = []
+        for chunk_objs in results:
+            for db_obj in chunk_objs:
+                if inspect(db_obj).key in identity_map:
+                    db_obj = await db.merge(db_obj, load=False)
+                else:
+                    db.add(db_obj)
+                db_objs.append(db_obj)
+        return db_objs
+
+    @batch_method
+    async def get_versions(
+        self, db: AsyncSession, *, ids: List[Any], fields: Optional[List[str]] = None
+    ) -> List[Tuple[Any, ...]]:
+        """
+        Versions of the existing `ids`, see conditional.version_columns, with
+        a column select instead of loading the rows.
+        """
+        columns = version_columns(self.model, fields)
+        stmt = select_versions_by_ids(self.model, dialect_name(db), columns)
+        versions: List[Tuple[Any, ...]] = []
+        # same chunks as batch_get, an id repeated across them counts once
+        for chunk in chunked(unique_ids(ids), self.batch_size):
+            params = ids_params(dialect_name(db), list(chunk))
+            versions.extend(tuple(row) for row in await db.execute(stmt, params))
+        return versions
 
     async def get_multi(
-        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        fields: Optional[List[str]] = None,
+        spec: Optional[QuerySpec] = None,
     ) -> List[ModelType]:
-        result = await db.execute(select(self.model).offset(skip).limit(limit))
+        stmt = self._multi_stmt(skip=skip, limit=limit, fields=fields, spec=spec)
+        result = await db.execute(stmt)
         return list(result.scalars().all())
 
+    async def get_multi_rows(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        fields: Optional[List[str]] = None,
+        spec: Optional[QuerySpec] = None,
+    ) -> List[Any]:
+        """
+        Lightweight get_multi for large read-only results: a column select mapped
+        into `row_class` instances, no ORM instance and no identity map entry.
+        """
+        fieldset = frozenset(fields) if fields else None
+        stmt = self._with_spec(select_rows(self.model, fieldset), spec)
+        result = await db.execute(stmt.offset(skip).limit(limit))
+        return to_rows(self.model, fieldset, result)
+
+    @batch_method
+    async def batch_get_rows(
+        self, db: AsyncSession, *, ids: List[Any], fields: Optional[List[str]] = None
+    ) -> List[Any]:
+        """Lightweight batch_get, see get_multi_rows. The cache is not used."""
+        ids = unique_ids(ids)
+        fieldset = frozenset(fields) if fields else None
+        stmt = select_rows_by_ids(self.model, dialect_name(db), fieldset)
+        rows: List[Any] = []
+        for chunk in chunked(ids, self.batch_size):
+            result = await db.execute(stmt, ids_params(dialect_name(db), list(chunk)))
+            rows.extend(to_rows(self.model, fieldset, result))
+        return order_by_ids(ids, rows)
+
+    async def iter_multi(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: Optional[int] = 100,
+        fields: Optional[List[str]] = None,
+        spec: Optional[QuerySpec] = None,
+        yield_per: int = 1000,
+    ) -> AsyncIterator[ModelType]:
+        """Like get_multi, rows are fetched `yield_per` at a time as they are consumed."""
+        stmt = self._multi_stmt(skip=skip, limit=limit, fields=fields, spec=spec)
+        result = await db.stream_scalars(stmt.execution_options(yield_per=yield_per))
+        async for row in result:
+            yield row
+
+    @batch_method
+    async def iter_batch_get(
+        self, db: AsyncSession, *, ids: List[Any], fields: Optional[List[str]] = None
+    ) -> AsyncIterator[ModelType]:
+        """Like batch_get without the cache, one query per `batch_size` ids."""
+        stmt = self._with_fields(select_by_ids(self.model, dialect_name(db)), fields)
+        for chunk in chunked(unique_ids(ids), self.batch_size):
+            chunk = list(chunk)
+            result = await db.scalars(stmt, ids_params(dialect_name(db), chunk))
+            for row in order_by_ids(chunk, result):
+                yield row
+
+    async def get_multi_by_cursor(
+        self,
+        db: AsyncSession,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        order_by: str = "id",
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """
+        Keyset pagination on an indexed column, returns the rows and the opaque
+        cursor of the next page (None on the last page).
+        """
+        stmt = keyset_select(self.model, cursor=cursor, limit=limit, order_by=order_by)
+        result = await db.execute(stmt)
+        return to_page(list(result.scalars().all()), limit=limit, order_by=order_by)
+
     async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
-        obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data)
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
+        obj_in_data = encode_model(obj_in)
+        if obj_in_data.get("id", False) is None:
+            # as in an ORM flush, a None primary key is left to the database
+            del obj_in_data["id"]
+        if supports_insert_returning(db):
+            # server defaults come back in the same round-trip, no refresh needed
+            stmt = insert(self.model).values(obj_in_data).returning(self.model)
+            db_obj = (await db.scalars(stmt)).one()
+            db.expunge(db_obj)
+            await self._commit(db)
+        else:
+            db_obj = self.model(**obj_in_data)
+            db.add(db_obj)
+            await self._commit(db)
+            await db.refresh(db_obj)
+        self._invalidate(db, [db_obj.id])
         return db_obj
 
+    @batch_method
     async def batch_create(
         self, db: AsyncSession, *, objs: List[CreateSchemaType]
     ) -> List[ModelType]:
-        raise NotImplementedError
+        data_inputs = [encode_model(obj_in, exclude_unset=True) for obj_in in objs]
+        models: List[ModelType] = []
+        if supports_executemany_returning(db):
+            # rows come back in the order of their parameters, not of their ids
+            stmt = insert(self.model).returning(
+                self.model, sort_by_parameter_order=True
+            )
+            for chunk in chunked(data_inputs, self.batch_size):
+                models.extend((await db.scalars(stmt, chunk)).all())
+        else:
+            for chunk in chunked(data_inputs, self.batch_size):
+                chunk_models = [self.model(**data_input) for data_input in chunk]
+                db.add_all(chunk_models)
+                await db.flush()
+                # load server defaults with one SELECT per chunk, not per row,
+                # the rows must be consumed for the instances to be refreshed
+                result = await db.scalars(
+                    select(self.model)
+                    .where(self.model.id.in_([m.id for m in chunk_models]))
+                    .execution_options(populate_existing=True)
+                )
+                result.all()
+                models.extend(chunk_models)
+        # keep the loaded state instead of re-selecting every row after commit
+        for model in models:
+            db.expunge(model)
+        await self._commit(db)
+        self._invalidate(db, [model.id for model in models])
+        return models
 
     async def batch_create_silently(
         self, db: AsyncSession, *, objs: List[CreateSchemaType]
     ) -> None:
-        data_inputs = [jsonable_encoder(obj_in, exclude_unset=True) for obj_in in objs]
-        models = [self.model(**data_input) for data_input in data_inputs]
-        db.add_all(models)
-        await db.commit()
+        data_inputs = [encode_model(obj_in, exclude_unset=True) for obj_in in objs]
+        await self.insert_rows(db, rows=data_inputs)
+
+    @batch_method
+    async def insert_rows(
+        self, db: AsyncSession, *, rows: List[Dict[str, Any]]
+    ) -> None:
+        """Insert encoded rows, one executemany per set of keys and chunk."""
+        for rows_of_keys in group_by_keys(rows).values():
+            for chunk in chunked(rows_of_keys, self.batch_size):
+                await db.execute(insert(self.model), chunk)
+        await self._commit(db)
+
+    @batch_method
+    async def batch_upsert(
+        self,
+        db: AsyncSession,
+        *,
+        objs: List[Union[CreateSchemaType, Dict[str, Any]]],
+        conflict_keys: Sequence[str] = ("id",),
+        update_columns: Optional[Sequence[str]] = None,
+        returning: bool = False,
+    ) -> List[ModelType]:
+        """
+        Insert `objs`, or update the rows they conflict with on `conflict_keys`
+        (a primary key or unique index), in one statement per chunk. Returns
+        the inserted / updated rows with `returning=True`, re-selected by
+        `conflict_keys` where the dialect has no RETURNING (MySQL), so there
+        every object must set them. Invalid keys or columns raise ValueError.
+        """
+        data_inputs = [encode_model(obj_in, exclude_unset=True) for obj_in in objs]
+        # the cache is invalidated by id, so the ids are needed anyway
+        fetch = returning or self.cache is not None
+        use_returning = fetch and supports_executemany_returning(db)
+        if returning and not use_returning:
+            # the rows are found again by their conflict keys, e.g. an insert
+            # leaving the id to AUTO_INCREMENT would be missing from the result
+            if any(not set(conflict_keys) <= set(row) for row in data_inputs):
+                raise ValueError(
+                    f"returning=True needs every object to set {list(conflict_keys)} "
+                    f"on the {dialect_name(db)} dialect"
+                )
+        models: List[ModelType] = []
+        for keys, rows_of_keys in group_by_keys(data_inputs).items():
+            columns = upsert_update_columns(
+                self.model, keys, conflict_keys, update_columns
+            )
+            stmt = upsert_statement(db, self.model, conflict_keys, columns)
+            for chunk in chunked(rows_of_keys, self.batch_size):
+                if use_returning:
+                    result = await db.scalars(
+                        stmt.returning(self.model),
+                        chunk,
+                        execution_options={"populate_existing": True},
+                    )
+                    models.extend(result.all())
+                else:
+                    await db.execute(stmt, chunk)
+        if fetch and not use_returning:
+            for select_stmt in select_by_keys(
+                self.model, data_inputs, conflict_keys, self.batch_size
+            ):
+                models.extend((await db.scalars(select_stmt)).all())
+        # a row several objects conflict with comes back once
+        models = list(dict.fromkeys(models))
+        for model in models:
+            db.expunge(model)
+        await self._commit(db)
+        self._invalidate(db, [model.id for model in models])
+        return models if returning else []
 
     async def update(
         self,
@@ -67,19 +396,95 @@ class AsyncCRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]],
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
-        if isinstance(obj_in, dict):
-            update_data = obj_in
-        else:
-            update_data = obj_in.model_dump(exclude_unset=True)
-        for field in obj_data:
+        update_data = self._get_update_data(obj_in)
+        if supports_update_returning(db):
+            updated = await self._update_returning(
+                db, id=db_obj.id, update_data=update_data
+            )
+            return updated if updated is not None else db_obj
+        for field in column_names(self.model):
             if field in update_data:
                 setattr(db_obj, field, update_data[field])
         db.add(db_obj)
-        await db.commit()
+        await self._commit(db)
         await db.refresh(db_obj)
+        self._invalidate(db, [db_obj.id])
         return db_obj
 
+    @batch_method
+    async def batch_update(
+        self, db: AsyncSession, *, objs: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Update many rows by primary key, every dict must contain `id`.
+        Sent as one executemany UPDATE per chunk, nothing is loaded. Unknown
+        fields raise ValueError, ids without a row StaleDataError.
+        """
+        if any("id" not in obj for obj in objs):
+            raise ValueError("every object needs an id")
+        self._check_fields({key for obj in objs for key in obj})
+        for chunk in chunked(objs, self.batch_size):
+            await db.execute(update(self.model), chunk)
+        await self._commit(db)
+        self._invalidate(db, [obj["id"] for obj in objs])
+
+    @batch_method
+    async def batch_update_by_ids(
+        self,
+        db: AsyncSession,
+        *,
+        ids: List[Any],
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+    ) -> List[ModelType]:
+        """Apply the same change to every row in `ids`, returns the updated rows."""
+        update_data = self._update_values(obj_in)
+        if not update_data:
+            return await self.batch_get(db, ids=ids)
+        models: List[ModelType] = []
+        for chunk in chunked(ids, self.batch_size):
+            stmt = (
+                update(self.model).where(self.model.id.in_(chunk)).values(update_data)
+            )
+            if supports_update_returning(db):
+                models.extend((await db.scalars(stmt.returning(self.model))).all())
+            else:
+                await db.execute(stmt, execution_options={"synchronize_session": False})
+                result = await db.scalars(
+                    select(self.model)
+                    .where(self.model.id.in_(chunk))
+                    .execution_options(populate_existing=True)
+                )
+                models.extend(result.all())
+        for model in models:
+            db.expunge(model)
+        await self._commit(db)
+        self._invalidate(db, ids)
+        return models
+
+    @batch_method
+    async def batch_update_by_ids_silently(
+        self,
+        db: AsyncSession,
+        *,
+        ids: List[Any],
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+    ) -> int:
+        update_data = self._update_values(obj_in)
+        if not update_data:
+            return 0
+        rowcount = 0
+        for chunk in chunked(ids, self.batch_size):
+            stmt = (
+                update(self.model).where(self.model.id.in_(chunk)).values(update_data)
+            )
+            result = await db.execute(
+                stmt, execution_options={"synchronize_session": False}
+            )
+            rowcount += result.rowcount
+        await self._commit(db)
+        self._invalidate(db, ids)
+        return rowcount
+
     async def update_by_id(
         self,
         db: AsyncSession,
@@ -87,21 +492,171 @@ class AsyncCRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         id: Any,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]],
     ) -> Optional[ModelType]:
-        db_obj = await self.get(db, id=id)
-        if db_obj is not None:
-            return await self.update(db, db_obj=db_obj, obj_in=obj_in)
+        if supports_update_returning(db):
+            db_obj = await self._update_returning(
+                db, id=id, update_data=self._get_update_data(obj_in)
+            )
         else:
+            # the row is read to be written, a lagging replica won't do
+            use_primary(db)
+            db_obj = await self.get(db, id=id)
+            if db_obj is not None:
+                db_obj = await self.update(db, db_obj=db_obj, obj_in=obj_in)
+        if db_obj is None:
             logger.error(
                 f"update_by_id: {id} not found in tbale {self.model.__tablename__}"
             )
-            return None
+        return db_obj
+
+    async def _update_returning(
+        self, db: AsyncSession, *, id: Any, update_data: Dict[str, Any]
+    ) -> Optional[ModelType]:
+        """Single UPDATE ... RETURNING, refreshes an already loaded object in place."""
+        values = {k: v for k, v in update_data.items() if k in column_names(self.model)}
+        if not values:
+            return await self.get(db, id=id)
+        stmt = (
+            update(self.model)
+            .where(self.model.id == id)
+            .values(values)
+            .returning(self.model)
+            .execution_options(populate_existing=True)
+        )
+        db_obj = (await db.scalars(stmt)).one_or_none()
+        if db_obj is not None:
+            db.expunge(db_obj)
+        await self._commit(db)
+        self._invalidate(db, [id])
+        return db_obj
 
     async def remove(self, db: AsyncSession, *, id: Any) -> Optional[ModelType]:
-        result = await db.execute(select(self.model).where(self.model.id == id))
-        obj = result.scalar()
+        use_primary(db)
+        # the identity map first, then SQLAlchemy's own cached primary key load
+        obj = await db.get(self.model, id)
         if obj:
             await db.delete(obj)
-            await db.commit()
+            await self._commit(db)
+            self._invalidate(db, [id])
             return obj
         else:
             return None
+
+    @batch_method
+    async def batch_remove(
+        self, db: AsyncSession, *, ids: List[Any]
+    ) -> List[ModelType]:
+        """Delete every row in `ids`, returns the deleted rows."""
+        models: List[ModelType] = []
+        for chunk in chunked(ids, self.batch_size):
+            stmt = delete(self.model).where(self.model.id.in_(chunk))
+            if supports_delete_returning(db):
+                models.extend((await db.scalars(stmt.returning(self.model))).all())
+            else:
+                result = await db.scalars(
+                    select(self.model).where(self.model.id.in_(chunk))
+                )
+                models.extend(result.all())
+                await db.execute(stmt, execution_options={"synchronize_session": False})
+        for model in models:
+            db.expunge(model)
+        await self._commit(db)
+        self._invalidate(db, ids)
+        return models
+
+    @batch_method
+    async def batch_remove_silently(self, db: AsyncSession, *, ids: List[Any]) -> int:
+        rowcount = 0
+        for chunk in chunked(ids, self.batch_size):
+            stmt = delete(self.model).where(self.model.id.in_(chunk))
+            result = await db.execute(
+                stmt, execution_options={"synchronize_session": False}
+            )
+            rowcount += result.rowcount
+        await self._commit(db)
+        self._invalidate(db, ids)
+        return rowcount
+
+    def _get_update_data(
+        self, obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        if isinstance(obj_in, dict):
+            return obj_in
+        return obj_in.model_dump(exclude_unset=True)
+
+    def _update_values(
+        self, obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Update data of a statement-level UPDATE, unknown columns raise ValueError."""
+        update_data = self._get_update_data(obj_in)
+        self._check_fields(update_data)
+        return update_data
+
+    def _check_fields(self, fields: Iterable[str]) -> None:
+        unknown = set(fields) - column_names(self.model)
+        if unknown:
+            raise ValueError(
+                f"unknown fields {sorted(unknown)} for table {self.model.__tablename__}"
+            )
+
+    async def _from_cache(self, db: AsyncSession, data: Dict[str, Any]) -> ModelType:
+        # attach the cached row as a clean persistent object, no SELECT is issued
+        db_obj = self.model(**data)
+        make_transient_to_detached(db_obj)
+        return await db.merge(db_obj, load=False)
+
+    def _use_cache(self, db: AsyncSession, fields: Optional[List[str]]) -> bool:
+        # in a transaction scope the session sees uncommitted rows, which must
+        # neither fill the shared cache nor be shadowed by older cached ones
+        return self.cache is not None and not fields and not in_transaction(db)
+
+    def _invalidate(self, db: AsyncSession, ids: Iterable[Any]) -> None:
+        if self.cache is not None:
+            cache, model, ids = self.cache, self.model, list(ids)
+            # inside a transaction scope, only once the data is committed
+            after_commit(db, lambda: cache.invalidate(model, ids))
+
+    async def _commit(self, db: AsyncSession) -> None:
+        if in_transaction(db):
+            await db.flush()
+        else:
+            await db.commit()
+
+    def _load_options(self, fields: Optional[List[str]]) -> List[Any]:
+        return [load_only_columns(self.model, fields)] if fields else []
+
+    def _multi_stmt(
+        self,
+        *,
+        skip: int,
+        limit: Optional[int],
+        fields: Optional[List[str]],
+        spec: Optional[QuerySpec],
+    ) -> Any:
+        stmt = self._with_fields(select_all(self.model), fields)
+        return self._with_spec(stmt, spec).offset(skip).limit(limit)
+
+    def _with_spec(self, stmt: Any, spec: Optional[QuerySpec]) -> Any:
+        if spec is None:
+            return stmt
+        clauses, order_by = compile_query_spec(self.model, spec, self.filterable_fields)
+        return stmt.where(*clauses).order_by(*order_by)
+
+    def _with_fields(self, stmt: Any, fields: Optional[List[str]]) -> Any:
+        # the precomputed statement is reused as is without a sparse fieldset
+        return stmt.options(*self._load_options(fields)) if fields else stmt
+
+    @property
+    def filterable_fields(self) -> FrozenSet[str]:
+        # resolved on first use, mappers may not be configured yet in __init__
+        if self._filterable_fields is None:
+            indexed = indexed_column_names(self.model)
+            if self._filterable_fields_arg is None:
+                self._filterable_fields = indexed
+            else:
+                self._filterable_fields = frozenset(self._filterable_fields_arg)
+                for name in sorted(self._filterable_fields - indexed):
+                    logger.warning(
+                        f"filterable field {name} has no index in table "
+                        f"{self.model.__tablename__}, filtering on it scans the table"
+                    )
+        return self._filterable_fields
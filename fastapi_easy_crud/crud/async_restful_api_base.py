@@ -1,12 +1,28 @@
-from typing import (Annotated, Any, Dict, Generic, List, Optional, Type,
-                    TypeVar, Union)
+import asyncio
+from typing import (Annotated, Any, AsyncIterator, Callable, Dict, Generic,
+                    List, Optional, Type, TypeVar, Union)
 
-from fastapi import APIRouter, Depends, Query
-from pydantic import BaseModel
+from fastapi import (APIRouter, Body, Depends, HTTPException, Query, Request,
+                     Response)
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
 
 import fastapi_easy_crud.db.async_db_deps as deps
+from fastapi_easy_crud.crud import conditional
 from fastapi_easy_crud.crud.async_crud_base import AsyncCRUDBase
+from fastapi_easy_crud.crud.conditional import (VERSION_FIELDS, row_versions,
+                                                version_columns)
+from fastapi_easy_crud.crud.dataloader import AsyncGetLoader
+from fastapi_easy_crud.crud.pagination import Page
+from fastapi_easy_crud.crud.query import QuerySpec, compile_query_spec
+from fastapi_easy_crud.crud.streaming import (Compressor, RowEncoder,
+                                              aiter_batches,
+                                              negotiate_encoding)
+from fastapi_easy_crud.crud.utils import (list_adapter, load_only_columns,
+                                          project_schema)
+from fastapi_easy_crud.crud.write_behind import AsyncWriteBehind
 
 AsyncCrudInstanceType = TypeVar("AsyncCrudInstanceType", bound=AsyncCRUDBase)
 
@@ -26,6 +42,13 @@ class AsyncBaseAPI(
         get_schema_type: Type[GetSchemaType],
         create_schema_type: Type[CreateSchemaType],
         update_schema_type: Type[UpdateSchemaType],
+        use_dataloader: bool = False,
+        dataloader_window: float = 0.002,
+        fast_serialization: bool = False,
+        conditional_get: bool = True,
+        lightweight_reads: bool = False,
+        use_write_behind: bool = False,
+        write_behind_max_queue_size: int = 100000,
     ) -> None:
         self.prefix = prefix
         self.tags = tags
@@ -33,6 +56,26 @@ class AsyncBaseAPI(
         self.get_schema_type = get_schema_type
         self.create_schema_type = create_schema_type
         self.update_schema_type = update_schema_type
+        # validate + dump to JSON bytes in one pass, skipping response_model
+        self.fast_serialization = fast_serialization
+        # coalesce concurrent /get calls into one batch_get per window
+        self.dataloader = (
+            AsyncGetLoader(crud_instance, window=dataloader_window)
+            if use_dataloader
+            else None
+        )
+        # ETag / Last-Modified and 304 answers on /get, /batch_get and /all
+        self.conditional_get = conditional_get
+        # /batch_create_silently returns once the rows are queued, started by db_lifespan
+        self.write_behind = (
+            AsyncWriteBehind(crud_instance, max_queue_size=write_behind_max_queue_size)
+            if use_write_behind
+            else None
+        )
+        # /all and /batch_get read plain column rows instead of ORM instances
+        self.lightweight_reads = lightweight_reads
+        # rows serialized per chunk of a streamed response
+        self.stream_batch_size = 500
 
     def to_model(self, db_model: Any) -> GetSchemaType:
         return self.get_schema_type.model_validate(db_model)
@@ -40,50 +83,320 @@ class AsyncBaseAPI(
     def to_models(self, db_models: List[Any]) -> List[GetSchemaType]:
         return [self.to_model(m) for m in db_models]
 
+    @property
+    def list_adapter(self) -> TypeAdapter:
+        return list_adapter(self.get_schema_type)
+
+    def check_fields(self, fields: Optional[List[str]]) -> None:
+        """Reject sparse fieldsets that are not columns of both model and schema."""
+        if not fields:
+            return
+        try:
+            load_only_columns(self.crud_instance.model, fields)
+            project_schema(self.get_schema_type, frozenset(fields))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    def parse_query_spec(
+        self, filters: Optional[List[str]], sort: Optional[List[str]]
+    ) -> Optional[QuerySpec]:
+        """`?filter=name:eq:foo&filter=qty:gte:5&sort=-create_time,id`"""
+        if not filters and not sort:
+            return None
+        try:
+            return QuerySpec.parse(filters, sort)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    def check_query_spec(self, spec: Optional[QuerySpec]) -> None:
+        if spec is None:
+            return
+        try:
+            compile_query_spec(
+                self.crud_instance.model, spec, self.crud_instance.filterable_fields
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    def stream_rows(
+        self,
+        request: Request,
+        iter_rows: Callable[[AsyncSession], AsyncIterator[Any]],
+        fields: Optional[List[str]],
+        output_format: str,
+    ) -> StreamingResponse:
+        """
+        Serialize the rows batch by batch while they are fetched on a dedicated
+        session, compressed with the best encoding the client accepts.
+        `to_model` overrides are bypassed.
+        """
+        schema = (
+            project_schema(self.get_schema_type, frozenset(fields))
+            if fields
+            else self.get_schema_type
+        )
+        try:
+            encoder = RowEncoder(schema, output_format)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        compressor = Compressor(
+            negotiate_encoding(request.headers.get("accept-encoding", ""))
+        )
+
+        async def iter_body() -> AsyncIterator[bytes]:
+            # the request scoped session is closed before the body is sent
+            async with deps.get_async_session_maker()() as db:
+                async for batch in aiter_batches(iter_rows(db), self.stream_batch_size):
+                    yield compressor.compress(encoder.encode(batch))
+            yield compressor.compress(encoder.close()) + compressor.flush()
+
+        headers = {"Vary": "Accept-Encoding"}
+        if compressor.encoding:
+            headers["Content-Encoding"] = compressor.encoding
+        return StreamingResponse(
+            iter_body(), media_type=encoder.media_type, headers=headers
+        )
+
+    def serialize_model(self, db_model: Any, fields: Optional[List[str]] = None) -> Any:
+        """
+        Route return value for a single row. With `fast_serialization` or a sparse
+        fieldset the JSON body is built directly, bypassing `to_model` overrides.
+        """
+        if not self.fast_serialization and not fields:
+            return self.to_model(db_model)
+        if db_model is None:
+            return Response(b"null", media_type="application/json")
+        schema = (
+            project_schema(self.get_schema_type, frozenset(fields))
+            if fields
+            else self.get_schema_type
+        )
+        content = schema.model_validate(db_model).model_dump_json()
+        return Response(content, media_type="application/json")
+
+    def serialize_models(
+        self, db_models: List[Any], fields: Optional[List[str]] = None
+    ) -> Any:
+        if not self.fast_serialization and not fields:
+            return self.to_models(db_models)
+        adapter = (
+            list_adapter(project_schema(self.get_schema_type, frozenset(fields)))
+            if fields
+            else self.list_adapter
+        )
+        content = adapter.dump_json(
+            adapter.validate_python(db_models, from_attributes=True)
+        )
+        return Response(content, media_type="application/json")
+
+    def version_fields(self, fields: Optional[List[str]]) -> Optional[List[str]]:
+        """A sparse fieldset still loads the columns the ETag is computed from."""
+        if not fields or not self.conditional_get:
+            return fields
+        return list(dict.fromkeys([*fields, *VERSION_FIELDS]))
+
+    def row_versions(
+        self, db_rows: List[Any], fields: Optional[List[str]]
+    ) -> List[Any]:
+        columns = version_columns(self.crud_instance.model, fields)
+        return row_versions(db_rows, columns)
+
+    def cache_headers(
+        self, versions: List[Any], fields: Optional[List[str]], single: bool = False
+    ) -> Dict[str, str]:
+        if not self.conditional_get or (single and not versions):
+            return {}
+        return conditional.cache_headers(versions, fields, single)
+
+    def not_modified(
+        self, request: Request, headers: Dict[str, str], found: bool
+    ) -> Optional[Response]:
+        if headers and conditional.is_not_modified(request.headers, headers, found):
+            return Response(status_code=304, headers=headers)
+        return None
+
+    @staticmethod
+    def with_headers(result: Any, response: Response, headers: Dict[str, str]) -> Any:
+        # a returned Response bypasses the headers set on the injected one
+        (result if isinstance(result, Response) else response).headers.update(headers)
+        return result
+
     def init_router(self, router: APIRouter) -> None:
         crud_instance = self.crud_instance
+        get_multi, batch_get = (
+            (crud_instance.get_multi_rows, crud_instance.batch_get_rows)
+            if self.lightweight_reads
+            else (crud_instance.get_multi, crud_instance.batch_get)
+        )
         get_schema_type: Type[GetSchemaType] = self.get_schema_type
         create_schema_type: Type[CreateSchemaType] = self.create_schema_type
         update_schema_type: Type[UpdateSchemaType] = self.update_schema_type
 
         @router.get("/all", response_model=List[get_schema_type])  # type: ignore
-        async def get_all(db: AsyncSession = Depends(deps.get_async_db)) -> Any:
-            db_rows = await crud_instance.get_multi(db=db)
-            return self.to_models(db_rows)
+        async def get_all(
+            request: Request,
+            response: Response,
+            skip: Annotated[int, Query(ge=0)] = 0,
+            limit: Annotated[int, Query(ge=1)] = 100,
+            fields: Annotated[Union[List[str], None], Query()] = None,
+            filters: Annotated[Union[List[str], None], Query(alias="filter")] = None,
+            sort: Annotated[Union[List[str], None], Query()] = None,
+            stream: bool = False,
+            output_format: Annotated[str, Query(alias="format")] = "json",
+            db: AsyncSession = Depends(deps.get_async_db),
+        ) -> Any:
+            self.check_fields(fields)
+            spec = self.parse_query_spec(filters, sort)
+            if stream or output_format != "json":
+                self.check_query_spec(spec)
+                return self.stream_rows(
+                    request,
+                    lambda db: crud_instance.iter_multi(
+                        db=db, skip=skip, limit=limit, fields=fields, spec=spec
+                    ),
+                    fields,
+                    output_format,
+                )
+            try:
+                db_rows = await get_multi(
+                    db=db,
+                    skip=skip,
+                    limit=limit,
+                    fields=self.version_fields(fields),
+                    spec=spec,
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            headers = self.cache_headers(self.row_versions(db_rows, fields), fields)
+            not_modified = self.not_modified(request, headers, bool(db_rows))
+            if not_modified is not None:
+                return not_modified
+            return self.with_headers(
+                self.serialize_models(db_rows, fields), response, headers
+            )
+
+        @router.get("/page", response_model=Page[get_schema_type])  # type: ignore
+        async def get_page(
+            cursor: Optional[str] = None,
+            limit: Annotated[int, Query(ge=1)] = 100,
+            order_by: str = "id",
+            db: AsyncSession = Depends(deps.get_async_db),
+        ) -> Any:
+            try:
+                db_rows, next_cursor = await crud_instance.get_multi_by_cursor(
+                    db=db, cursor=cursor, limit=limit, order_by=order_by
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            return {"items": self.to_models(db_rows), "next_cursor": next_cursor}
 
         @router.get("/batch_get", response_model=List[get_schema_type])  # type: ignore
         async def get_by_ids(
+            request: Request,
+            response: Response,
             ids: Annotated[Union[List[Any], None], Query()] = None,
+            fields: Annotated[Union[List[str], None], Query()] = None,
+            stream: bool = False,
+            output_format: Annotated[str, Query(alias="format")] = "json",
             db: AsyncSession = Depends(deps.get_async_db),
         ) -> Any:
-            db_rows = await crud_instance.batch_get(ids=ids, db=db)  # type: ignore
-            return self.to_models(db_rows)
+            self.check_fields(fields)
+            if stream or output_format != "json":
+                return self.stream_rows(
+                    request,
+                    lambda db: crud_instance.iter_batch_get(
+                        db=db, ids=ids or [], fields=fields
+                    ),
+                    fields,
+                    output_format,
+                )
+            db_rows = await batch_get(
+                ids=ids, db=db, fields=self.version_fields(fields)  # type: ignore
+            )
+            # compared once loaded, a cheaper pre-check would need a version
+            # column the database maintains on every write
+            headers = self.cache_headers(self.row_versions(db_rows, fields), fields)
+            not_modified = self.not_modified(request, headers, bool(db_rows))
+            if not_modified is not None:
+                return not_modified
+            return self.with_headers(
+                self.serialize_models(db_rows, fields), response, headers
+            )
+
+        @router.post("/batch_get", response_model=List[get_schema_type])  # type: ignore
+        async def post_by_ids(
+            request: Request,
+            ids: Annotated[List[Any], Body(embed=True)],
+            fields: Annotated[Union[List[str], None], Query()] = None,
+            stream: bool = False,
+            output_format: Annotated[str, Query(alias="format")] = "json",
+            db: AsyncSession = Depends(deps.get_async_db),
+        ) -> Any:
+            # same as GET /batch_get, for id lists too long for a query string
+            self.check_fields(fields)
+            if stream or output_format != "json":
+                return self.stream_rows(
+                    request,
+                    lambda db: crud_instance.iter_batch_get(
+                        db=db, ids=ids, fields=fields
+                    ),
+                    fields,
+                    output_format,
+                )
+            db_rows = await batch_get(ids=ids, db=db, fields=fields)
+            return self.serialize_models(db_rows, fields)
 
         @router.get("/get", response_model=Optional[get_schema_type])  # type: ignore
         async def get_by_id(
-            id: Any, db: AsyncSession = Depends(deps.get_async_db)
+            request: Request,
+            response: Response,
+            id: Any,
+            fields: Annotated[Union[List[str], None], Query()] = None,
+            db: AsyncSession = Depends(deps.get_async_db),
         ) -> Any:
-            db_row = await crud_instance.get(id=id, db=db)
-            return self.to_model(db_row)
+            self.check_fields(fields)
+            if self.dataloader is not None and not fields:
+                db_row = await self.dataloader.load(id)
+            else:
+                db_row = await crud_instance.get(
+                    id=id, db=db, fields=self.version_fields(fields)
+                )
+            headers = self.cache_headers(
+                self.row_versions([db_row], fields), fields, single=True
+            )
+            not_modified = self.not_modified(request, headers, db_row is not None)
+            if not_modified is not None:
+                return not_modified
+            return self.with_headers(
+                self.serialize_model(db_row, fields), response, headers
+            )
 
         @router.post("/create", response_model=Optional[get_schema_type])  # type: ignore
         async def create(
             create_obj: create_schema_type, db: AsyncSession = Depends(deps.get_async_db)  # type: ignore
         ) -> Any:
             db_row = await crud_instance.create(db=db, obj_in=create_obj)
-            return self.to_model(db_row)
+            return self.serialize_model(db_row)
 
         @router.post("/batch_create", response_model=List[get_schema_type])  # type: ignore
         async def batch_create(
             create_objs: List[create_schema_type], db: AsyncSession = Depends(deps.get_async_db)  # type: ignore
         ) -> Any:
             db_rows = await crud_instance.batch_create(db=db, objs=create_objs)
-            return self.to_models(db_rows)
+            return self.serialize_models(db_rows)
 
         @router.post("/batch_create_silently")  # type: ignore
         async def batch_create_silently(
             create_objs: List[create_schema_type], db: AsyncSession = Depends(deps.get_async_db)  # type: ignore
         ) -> Any:
+            if self.write_behind is not None:
+                try:
+                    await self.write_behind.enqueue(create_objs)
+                except asyncio.QueueFull as e:
+                    raise HTTPException(
+                        status_code=503, detail=str(e), headers={"Retry-After": "1"}
+                    )
+                return "success"
             await crud_instance.batch_create_silently(db=db, objs=create_objs)
             return "success"
 
@@ -96,7 +409,7 @@ class AsyncBaseAPI(
             db_row = await crud_instance.update(
                 db=db, db_obj=origin_obj, obj_in=update_obj
             )
-            return self.to_model(db_row)
+            return self.serialize_model(db_row)
 
         @router.put("/update_by_id", response_model=Optional[get_schema_type])
         async def update_by_id(
@@ -105,12 +418,68 @@ class AsyncBaseAPI(
             db: AsyncSession = Depends(deps.get_async_db),
         ) -> Any:
             db_row = await crud_instance.update_by_id(db=db, id=id, obj_in=update_obj)
-            return self.to_model(db_row)
+            return self.serialize_model(db_row)
+
+        @router.put("/batch_update")  # type: ignore
+        async def batch_update(
+            update_objs: List[Dict[str, Any]],
+            db: AsyncSession = Depends(deps.get_async_db),
+        ) -> Any:
+            try:
+                await crud_instance.batch_update(db=db, objs=update_objs)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            except StaleDataError as e:
+                # some of the ids have no row
+                raise HTTPException(status_code=404, detail=str(e))
+            return "success"
+
+        @router.post("/batch_upsert")  # type: ignore
+        async def batch_upsert(
+            upsert_objs: List[create_schema_type],  # type: ignore
+            conflict_keys: Annotated[Union[List[str], None], Query()] = None,
+            update_columns: Annotated[Union[List[str], None], Query()] = None,
+            returning: bool = False,
+            db: AsyncSession = Depends(deps.get_async_db),
+        ) -> Any:
+            try:
+                db_rows = await crud_instance.batch_upsert(
+                    db=db,
+                    objs=upsert_objs,
+                    conflict_keys=conflict_keys or ["id"],
+                    update_columns=update_columns,
+                    returning=returning,
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            return self.serialize_models(db_rows) if returning else "success"
+
+        @router.put("/batch_update_by_ids", response_model=List[get_schema_type])  # type: ignore
+        async def batch_update_by_ids(
+            ids: Annotated[List[Any], Query()],
+            update_obj: Union[update_schema_type, Dict[str, Any]],  # type: ignore
+            db: AsyncSession = Depends(deps.get_async_db),
+        ) -> Any:
+            try:
+                db_rows = await crud_instance.batch_update_by_ids(
+                    db=db, ids=ids, obj_in=update_obj
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            return self.serialize_models(db_rows)
 
         @router.delete("/delete", response_model=Optional[get_schema_type])
         async def delete(id: Any, db: AsyncSession = Depends(deps.get_async_db)) -> Any:
             db_row = await crud_instance.remove(db=db, id=id)
-            return self.to_model(db_row)
+            return self.serialize_model(db_row)
+
+        @router.delete("/batch_delete", response_model=List[get_schema_type])  # type: ignore
+        async def batch_delete(
+            ids: Annotated[List[Any], Query()],
+            db: AsyncSession = Depends(deps.get_async_db),
+        ) -> Any:
+            db_rows = await crud_instance.batch_remove(db=db, ids=ids)
+            return self.serialize_models(db_rows)
 
     def enhance_router(self, router: APIRouter) -> None:
         pass
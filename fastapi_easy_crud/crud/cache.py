@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+from sqlalchemy import inspect
+
+
+class CacheBackend:
+    """
+    Key value store used by EntityCache. Values are plain dicts of column
+    values, a remote backend (e.g. redis) only has to (de)serialize them.
+    """
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def set_many(self, mapping: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete_many(self, keys: List[str]) -> None:
+        raise NotImplementedError
+
+
+class LRUCacheBackend(CacheBackend):
+    """In-process LRU cache with per entry TTL."""
+
+    def __init__(self, maxsize: int = 10000) -> None:
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._data.get(key)
+                if entry is None:
+                    continue
+                expire_at, value = entry
+                if expire_at is not None and expire_at <= now:
+                    del self._data[key]
+                    continue
+                self._data.move_to_end(key)
+                found[key] = value
+        return found
+
+    def set_many(self, mapping: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        expire_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            for key, value in mapping.items():
+                self._data[key] = (expire_at, value)
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete_many(self, keys: List[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+
+class EntityCache:
+    """
+    Read-through cache of rows keyed by (table, id), plug it into
+    `CRUDBase(model, cache=EntityCache())`. Writes through the CRUD object
+    invalidate the touched ids.
+    """
+
+    def __init__(
+        self, backend: Optional[CacheBackend] = None, ttl: Optional[float] = 300
+    ) -> None:
+        self.backend = backend or LRUCacheBackend()
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model: Type[Any], id: Any) -> str:
+        return f"{model.__tablename__}:{id}"
+
+    def get_many(self, model: Type[Any], ids: Iterable[Any]) -> Dict[str, Any]:
+        """Returns the cached column values keyed by str(id)."""
+        keys = {self.key(model, id): str(id) for id in ids}
+        found = self.backend.get_many(list(keys))
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return {keys[key]: value for key, value in found.items()}
+
+    def set_many(self, model: Type[Any], db_objs: Iterable[Any]) -> None:
+        column_keys = [attr.key for attr in inspect(model).column_attrs]
+        mapping = {
+            self.key(model, db_obj.id): {
+                key: getattr(db_obj, key) for key in column_keys
+            }
+            for db_obj in db_objs
+        }
+        if mapping:
+            self.backend.set_many(mapping, self.ttl)
+
+    def invalidate(self, model: Type[Any], ids: Iterable[Any]) -> None:
+        keys = [self.key(model, id) for id in ids]
+        if keys:
+            self.backend.delete_many(keys)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
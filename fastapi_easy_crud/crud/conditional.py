@@ -0,0 +1,95 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import (Any, Dict, Iterable, List, Mapping, Optional, Sequence,
+                    Tuple, Type)
+
+from sqlalchemy import inspect
+
+# fields a row needs loaded to compute its version
+VERSION_FIELDS = ("id", "last_modified_time")
+
+
+def version_columns(
+    model: Type[Any], fields: Optional[Sequence[str]]
+) -> Tuple[str, ...]:
+    """
+    Columns the version of a row is made of: id, last_modified_time and the
+    values sent. last_modified_time alone misses the writes of the same second,
+    or any write where the database doesn't maintain it.
+    """
+    names = fields or [attr.key for attr in inspect(model).column_attrs]
+    return tuple(dict.fromkeys([*VERSION_FIELDS, *names]))
+
+
+def row_versions(
+    db_objs: Iterable[Any], columns: Sequence[str]
+) -> List[Tuple[Any, ...]]:
+    return [
+        tuple(getattr(o, name) for name in columns) for o in db_objs if o is not None
+    ]
+
+
+def make_etag(
+    versions: Sequence[Tuple[Any, ...]], fields: Optional[Sequence[str]] = None
+) -> str:
+    """
+    Weak ETag of the rows' versions, independent of their order. The fieldset
+    is part of it, a sparse response is a different representation.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(",".join(sorted(fields or ())).encode())
+    for version in sorted(versions, key=lambda v: str(v[0])):
+        digest.update(f"|{version!r}".encode())
+    return f'W/"{digest.hexdigest()}"'
+
+
+def http_date(value: datetime) -> str:
+    # naive database timestamps are taken as UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def cache_headers(
+    versions: Sequence[Tuple[Any, ...]],
+    fields: Optional[Sequence[str]] = None,
+    single: bool = False,
+) -> Dict[str, str]:
+    """
+    ETag of the rows, plus Last-Modified for a single row only: the newest
+    timestamp of a list doesn't change when one of its rows is deleted.
+    """
+    headers = {"ETag": make_etag(versions, fields)}
+    if single and versions and isinstance(versions[0][1], datetime):
+        headers["Last-Modified"] = http_date(versions[0][1])
+    return headers
+
+
+def is_not_modified(
+    request_headers: Mapping[str, str],
+    response_headers: Mapping[str, str],
+    found: bool = True,
+) -> bool:
+    """
+    Evaluate If-None-Match, or If-Modified-Since without it (RFC 9110 13.2.2).
+    `found` tells whether any row exists, "*" only matches then.
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return found
+        etag = response_headers["ETag"]
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        # weak comparison
+        return etag in tags or etag[2:] in tags
+    if_modified_since = request_headers.get("if-modified-since")
+    last_modified = response_headers.get("Last-Modified")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(
+                if_modified_since
+            )
+        except (TypeError, ValueError):
+            return False
+    return False
@@ -0,0 +1,103 @@
+import asyncio
+import weakref
+from typing import Any, Callable, Dict, Optional, Set
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from fastapi_easy_crud.crud.async_crud_base import AsyncCRUDBase
+
+
+class _LoaderState:
+    def __init__(self) -> None:
+        # str(id) -> future, kept until resolved so in-flight ids are shared
+        self.futures: Dict[str, "asyncio.Future[Any]"] = {}
+        # str(id) -> id, waiting for the next dispatch
+        self.queue: Dict[str, Any] = {}
+        self.handle: Optional[asyncio.TimerHandle] = None
+        self.tasks: Set["asyncio.Task[None]"] = set()
+
+
+class AsyncGetLoader:
+    """
+    Coalesce concurrent `get` calls: ids requested within `window` seconds are
+    answered by one `batch_get` on a dedicated session, identical ids share a
+    single query (single-flight). State is kept per event loop.
+    """
+
+    def __init__(
+        self,
+        crud_instance: AsyncCRUDBase,
+        window: float = 0.002,
+        max_batch_size: int = 1000,
+        session_maker: Optional[Callable[[], async_sessionmaker[AsyncSession]]] = None,
+    ) -> None:
+        self.crud_instance = crud_instance
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.session_maker = session_maker
+        self.batches = 0
+        self.loads = 0
+        self._states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoaderState]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    async def load(self, id: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            state = self._states[loop] = _LoaderState()
+        self.loads += 1
+        key = str(id)
+        future = state.futures.get(key)
+        if future is None:
+            future = state.futures[key] = loop.create_future()
+            state.queue[key] = id
+            if len(state.queue) >= self.max_batch_size:
+                self._schedule(loop, state)
+            elif state.handle is None:
+                state.handle = loop.call_later(self.window, self._schedule, loop, state)
+        # shield: one cancelled caller must not cancel the shared future
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, int]:
+        return {"loads": self.loads, "batches": self.batches}
+
+    def _schedule(self, loop: asyncio.AbstractEventLoop, state: _LoaderState) -> None:
+        if state.handle is not None:
+            state.handle.cancel()
+            state.handle = None
+        batch, state.queue = state.queue, {}
+        if not batch:
+            return
+        task = loop.create_task(self._dispatch(state, batch))
+        state.tasks.add(task)
+        task.add_done_callback(state.tasks.discard)
+
+    async def _dispatch(self, state: _LoaderState, batch: Dict[str, Any]) -> None:
+        self.batches += 1
+        try:
+            if self.session_maker is None:
+                from fastapi_easy_crud.db.async_db_deps import \
+                    get_async_session_maker
+
+                self.session_maker = get_async_session_maker
+            async with self.session_maker()() as db:
+                db_objs = await self.crud_instance.batch_get(
+                    db, ids=list(batch.values())
+                )
+            found = {str(db_obj.id): db_obj for db_obj in db_objs}
+            for key in batch:
+                future = state.futures.pop(key)
+                if not future.done():
+                    future.set_result(found.get(key))
+        except Exception as e:
+            for key in batch:
+                future = state.futures.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+        finally:
+            # cancelled or interrupted: the waiting loads must not hang forever
+            for key in batch:
+                future = state.futures.pop(key, None)
+                if future is not None and not future.done():
+                    future.cancel()
@@ -0,0 +1,79 @@
+import functools
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+import anyio.to_thread
+from anyio import CapacityLimiter
+from fastapi import HTTPException
+
+from fastapi_easy_crud.db.engine import _ensure_settings, per_worker_pool_size
+
+ReturnType = TypeVar("ReturnType")
+
+
+class CRUDExecutor:
+    """
+    Runs blocking CRUD calls in a bounded thread pool so they don't stall the
+    event loop. By default there is one thread per pooled connection, callers
+    beyond `max_queue` waiting calls get a 503 instead of piling up.
+    """
+
+    def __init__(
+        self, max_workers: Optional[int] = None, max_queue: Optional[int] = None
+    ) -> None:
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._limiter: Optional[CapacityLimiter] = None
+
+    def _get_limiter(self) -> CapacityLimiter:
+        # created lazily, the limiter has to be built inside the event loop
+        if self._limiter is None:
+            if self.max_workers is None:
+                # the first request can come before any engine was built
+                _ensure_settings()
+                pool = per_worker_pool_size()
+                self.max_workers = pool["pool_size"] + pool["max_overflow"]
+            self._limiter = CapacityLimiter(self.max_workers)
+        return self._limiter
+
+    @property
+    def in_flight(self) -> int:
+        return int(self._limiter.borrowed_tokens) if self._limiter else 0
+
+    @property
+    def queued(self) -> int:
+        return self.pending - self.in_flight
+
+    async def run(
+        self, func: Callable[..., ReturnType], *args: Any, **kwargs: Any
+    ) -> ReturnType:
+        limiter = self._get_limiter()
+        if (
+            self.max_queue is not None
+            and self.pending >= limiter.total_tokens + self.max_queue
+        ):
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="database pool is saturated")
+        self.pending += 1
+        try:
+            return await anyio.to_thread.run_sync(
+                functools.partial(func, *args, **kwargs), limiter=limiter
+            )
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+# shared by every BaseAPI so the thread count follows the single engine pool
+default_executor = CRUDExecutor()
@@ -0,0 +1,105 @@
+import base64
+import json
+from typing import Any, Generic, List, Optional, Tuple, Type, TypeVar
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import Select, and_, or_, select
+
+from fastapi_easy_crud.crud.utils import indexed_column_names
+
+ItemType = TypeVar("ItemType")
+
+
+class Page(BaseModel, Generic[ItemType]):
+    items: List[ItemType]
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(values: List[Any]) -> str:
+    raw = json.dumps(jsonable_encoder(values), separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError as e:
+        raise ValueError(f"invalid cursor {cursor}") from e
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError(f"invalid cursor {cursor}")
+    return values
+
+
+def cursor_value(column: Any, value: Any, cursor: str) -> Any:
+    """`value` of a decoded cursor as the Python type of `column`."""
+    try:
+        return TypeAdapter(column.type.python_type).validate_python(value)
+    except ValueError as e:
+        raise ValueError(f"invalid cursor {cursor}") from e
+
+
+def parse_order_by(model: Type[Any], order_by: str) -> Tuple[str, bool]:
+    """`order_by` is a column name, prefixed with `-` for descending order."""
+    descending = order_by.startswith("-")
+    name = order_by.lstrip("-")
+    if name not in indexed_column_names(model):
+        raise ValueError(
+            f"order_by {name} is not an indexed column of table {model.__tablename__}"
+        )
+    # NULL compares to nothing, its rows would fall out of every keyset predicate
+    if getattr(model, name).nullable:
+        raise ValueError(
+            f"order_by {name} is a nullable column of table {model.__tablename__}"
+        )
+    return name, descending
+
+
+def keyset_select(
+    model: Type[Any],
+    *,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = 100,
+    order_by: str = "id",
+) -> Select:
+    """
+    SELECT ordered by (`order_by`, id) starting right after `cursor`.
+    Callers fetch `limit + 1` rows to know whether there is a next page.
+    """
+    name, descending = parse_order_by(model, order_by)
+    column = getattr(model, name)
+    pk = model.id
+    stmt = select(model)
+    if cursor:
+        value, last_id = decode_cursor(cursor)
+        value = cursor_value(column, value, cursor)
+        last_id = cursor_value(pk, last_id, cursor)
+        after = (lambda c, v: c < v) if descending else (lambda c, v: c > v)
+        if name == pk.key:
+            stmt = stmt.where(after(pk, value))
+        else:
+            stmt = stmt.where(
+                or_(after(column, value), and_(column == value, after(pk, last_id)))
+            )
+    if name == pk.key:
+        stmt = stmt.order_by(pk.desc() if descending else pk.asc())
+    else:
+        stmt = stmt.order_by(
+            column.desc() if descending else column.asc(),
+            pk.desc() if descending else pk.asc(),
+        )
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    return stmt
+
+
+def to_page(
+    rows: List[Any], *, limit: int, order_by: str = "id"
+) -> Tuple[List[Any], Optional[str]]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    name = order_by.lstrip("-")
+    return rows, encode_cursor([getattr(last, name), last.id])
@@ -0,0 +1,101 @@
+from functools import lru_cache
+from typing import Any, FrozenSet, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import ColumnElement
+
+OPERATORS = ("eq", "ne", "in", "gt", "gte", "lt", "lte", "like")
+
+
+class FilterSpec(BaseModel):
+    field: str
+    op: str = "eq"
+    value: Any = None
+
+    @classmethod
+    def parse(cls, expr: str) -> "FilterSpec":
+        """`field:op:value`, e.g. `name:eq:foo`, `qty:gte:5`, `id:in:1,2,3`."""
+        parts = expr.split(":", 2)
+        if len(parts) != 3 or parts[1] not in OPERATORS:
+            raise ValueError(
+                f"invalid filter {expr}, expected field:op:value with op in {OPERATORS}"
+            )
+        field, op, value = parts
+        return cls(field=field, op=op, value=value.split(",") if op == "in" else value)
+
+
+class SortSpec(BaseModel):
+    field: str
+    descending: bool = False
+
+    @classmethod
+    def parse(cls, expr: str) -> "SortSpec":
+        """`field` or `-field` for descending order."""
+        return cls(field=expr.lstrip("-"), descending=expr.startswith("-"))
+
+
+class QuerySpec(BaseModel):
+    filters: List[FilterSpec] = []
+    sort: List[SortSpec] = []
+
+    @classmethod
+    def parse(
+        cls, filters: Optional[List[str]] = None, sort: Optional[List[str]] = None
+    ) -> "QuerySpec":
+        return cls(
+            filters=[FilterSpec.parse(expr) for expr in filters or []],
+            sort=[
+                SortSpec.parse(expr)
+                for exprs in sort or []
+                for expr in exprs.split(",")
+                if expr
+            ],
+        )
+
+
+@lru_cache(maxsize=None)
+def _type_adapter(python_type: Type[Any]) -> TypeAdapter:
+    return TypeAdapter(python_type)
+
+
+def compile_query_spec(
+    model: Type[Any], spec: QuerySpec, allowed_fields: FrozenSet[str]
+) -> Tuple[List[ColumnElement], List[ColumnElement]]:
+    """
+    WHERE clauses and ORDER BY columns of `spec`. Only `allowed_fields` may be
+    used, string values are converted to the column's python type.
+    """
+    for name in [f.field for f in spec.filters] + [s.field for s in spec.sort]:
+        if name not in allowed_fields:
+            raise ValueError(
+                f"{name} is not a filterable field of table {model.__tablename__}, "
+                f"expected one of {sorted(allowed_fields)}"
+            )
+    clauses = []
+    for f in spec.filters:
+        column = getattr(model, f.field)
+        if f.op == "like":
+            clauses.append(column.like(str(f.value)))
+            continue
+        adapter = _type_adapter(column.type.python_type)
+        if f.op == "in":
+            clauses.append(column.in_([adapter.validate_python(v) for v in f.value]))
+            continue
+        value = adapter.validate_python(f.value)
+        if f.op == "eq":
+            clauses.append(column == value)
+        elif f.op == "ne":
+            clauses.append(column != value)
+        elif f.op == "gt":
+            clauses.append(column > value)
+        elif f.op == "gte":
+            clauses.append(column >= value)
+        elif f.op == "lt":
+            clauses.append(column < value)
+        elif f.op == "lte":
+            clauses.append(column <= value)
+    order_by = [
+        getattr(model, s.field).desc() if s.descending else getattr(model, s.field)
+        for s in spec.sort
+    ]
+    return clauses, order_by
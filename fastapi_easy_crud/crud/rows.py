@@ -0,0 +1,73 @@
+from functools import lru_cache
+from typing import Any, FrozenSet, Iterable, List, Optional, Tuple, Type
+
+from sqlalchemy import inspect
+
+from fastapi_easy_crud.crud.utils import column_names
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover
+    msgspec = None
+
+
+class LightRow:
+    """
+    Base of the generated row classes: one slot per column and nothing else,
+    no identity map, no change tracking, no lazy loading.
+    """
+
+    __slots__: Tuple[str, ...] = ()
+
+    def __init__(self, *values: Any) -> None:
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({values})"
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+
+def row_columns(model: Type[Any], fields: Optional[FrozenSet[str]]) -> List[str]:
+    """Attribute names of the selected columns in table order, the primary key always."""
+    if fields:
+        unknown = fields - column_names(model)
+        if unknown:
+            raise ValueError(
+                f"unknown fields {sorted(unknown)} for table {model.__tablename__}"
+            )
+    return [
+        attr.key
+        for attr in inspect(model).column_attrs
+        if not fields or attr.key in fields or attr.columns[0].primary_key
+    ]
+
+
+@lru_cache(maxsize=256)
+def row_class(model: Type[Any], fields: Optional[FrozenSet[str]] = None) -> Type[Any]:
+    """
+    Compact class of the rows of `model` restricted to `fields`, generated once:
+    a msgspec Struct outside of the garbage collector when msgspec is installed,
+    else a `LightRow` with `__slots__`.
+    """
+    names = row_columns(model, fields)
+    class_name = f"{model.__name__}Row"
+    if msgspec is not None:
+        return msgspec.defstruct(
+            class_name, [(name, Any, None) for name in names], gc=False
+        )
+    return type(class_name, (LightRow,), {"__slots__": tuple(names)})
+
+
+def to_rows(
+    model: Type[Any], fields: Optional[FrozenSet[str]], rows: Iterable[Any]
+) -> List[Any]:
+    cls = row_class(model, fields)
+    return [cls(*row) for row in rows]
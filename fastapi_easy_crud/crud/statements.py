@@ -0,0 +1,192 @@
+import functools
+import inspect
+import threading
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import (Any, Callable, Dict, FrozenSet, List, Optional, Set, Tuple,
+                    Type, TypeVar)
+
+from sqlalchemy import ARRAY, Engine, any_, bindparam, event, select
+from sqlalchemy.engine.default import DefaultDialect
+
+from fastapi_easy_crud.crud.rows import row_columns
+
+# smallest padded IN list, below it every length gets its own statement anyway
+MIN_IDS_BUCKET = 8
+
+FuncType = TypeVar("FuncType", bound=Callable[..., Any])
+
+# SQL texts already run by the batch method in progress, see `batch_method`
+current_batch: ContextVar[Optional[Set[str]]] = ContextVar(
+    "current_batch", default=None
+)
+
+
+@lru_cache(maxsize=None)
+def select_all(model: Type[Any]) -> Any:
+    return select(model)
+
+
+@lru_cache(maxsize=None)
+def select_by_id(model: Type[Any]) -> Any:
+    return select(model).where(model.id == bindparam("id"))
+
+
+def _ids_clause(model: Type[Any], dialect_name: str) -> Any:
+    if dialect_name == "postgresql":
+        # id = ANY(:ids) with one array parameter, the SQL text never changes
+        return model.id == any_(bindparam("ids", type_=ARRAY(model.id.type)))
+    return model.id.in_(bindparam("ids", expanding=True))
+
+
+@lru_cache(maxsize=None)
+def select_by_ids(model: Type[Any], dialect_name: str) -> Any:
+    return select(model).where(_ids_clause(model, dialect_name))
+
+
+@lru_cache(maxsize=256)
+def select_rows(model: Type[Any], fields: Optional[FrozenSet[str]] = None) -> Any:
+    """Column select matching `row_class(model, fields)`, no ORM entity is loaded."""
+    return select(*[getattr(model, name) for name in row_columns(model, fields)])
+
+
+@lru_cache(maxsize=256)
+def select_rows_by_ids(
+    model: Type[Any], dialect_name: str, fields: Optional[FrozenSet[str]] = None
+) -> Any:
+    return select_rows(model, fields).where(_ids_clause(model, dialect_name))
+
+
+@lru_cache(maxsize=256)
+def select_versions_by_ids(
+    model: Type[Any], dialect_name: str, columns: Tuple[str, ...]
+) -> Any:
+    stmt = select(*[getattr(model, name) for name in columns])
+    return stmt.where(_ids_clause(model, dialect_name))
+
+
+def ids_params(dialect_name: str, ids: List[Any]) -> Dict[str, Any]:
+    """
+    Parameters of the `select_*_by_ids` statements. An expanding IN renders one
+    placeholder per id, padding the list to a power of two with its last id
+    bounds the distinct SQL texts the database has to prepare to log2(n).
+    """
+    ids = list(ids)
+    if dialect_name == "postgresql" or not ids:
+        return {"ids": ids}
+    size = max(MIN_IDS_BUCKET, 1 << (len(ids) - 1).bit_length())
+    return {"ids": ids + [ids[-1]] * (size - len(ids))}
+
+
+def batch_method(func: FuncType) -> FuncType:
+    """
+    Mark a CRUD method that runs its statements once per chunk: while it runs,
+    `current_batch` collects their SQL texts so the metrics don't report the
+    repetitions as N+1. Works on functions, coroutines and (async) generators.
+    """
+    if inspect.isasyncgenfunction(func):
+
+        @functools.wraps(func)
+        async def async_gen_wrapper(*args: Any, **kwargs: Any) -> Any:
+            batch: Set[str] = set()
+            items = func(*args, **kwargs)
+            while True:
+                token = current_batch.set(batch)
+                try:
+                    item = await items.__anext__()
+                except StopAsyncIteration:
+                    return
+                finally:
+                    current_batch.reset(token)
+                yield item
+
+        return async_gen_wrapper  # type: ignore
+    if inspect.isgeneratorfunction(func):
+
+        @functools.wraps(func)
+        def gen_wrapper(*args: Any, **kwargs: Any) -> Any:
+            batch: Set[str] = set()
+            items = func(*args, **kwargs)
+            while True:
+                token = current_batch.set(batch)
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return
+                finally:
+                    current_batch.reset(token)
+                yield item
+
+        return gen_wrapper  # type: ignore
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            token = current_batch.set(set())
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                current_batch.reset(token)
+
+        return async_wrapper  # type: ignore
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        token = current_batch.set(set())
+        try:
+            return func(*args, **kwargs)
+        finally:
+            current_batch.reset(token)
+
+    return wrapper  # type: ignore
+
+
+class StatementCacheStats:
+    """Hits and misses of SQLAlchemy's compiled statement cache, for every engine."""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+        self._lock = threading.Lock()
+
+    def _after_cursor_execute(
+        self,
+        conn: Any,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        cache_hit = getattr(context, "cache_hit", None)
+        with self._lock:
+            if cache_hit == DefaultDialect.CACHE_HIT:
+                self.hits += 1
+            elif cache_hit == DefaultDialect.CACHE_MISS:
+                self.misses += 1
+            else:
+                self.uncached += 1
+
+    def stats(self) -> Dict[str, Any]:
+        cached = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "uncached": self.uncached,
+            "hit_ratio": self.hits / cached if cached else None,
+        }
+
+
+statement_cache_stats = StatementCacheStats()
+
+
+def track_statement_cache() -> None:
+    """Start counting `statement_cache_stats`. Idempotent."""
+    listener = statement_cache_stats._after_cursor_execute
+    if not event.contains(Engine, "after_cursor_execute", listener):
+        event.listen(Engine, "after_cursor_execute", listener)
+
+
+def dialect_name(db: Any) -> str:
+    return db.get_bind().dialect.name
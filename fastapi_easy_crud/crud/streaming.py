@@ -0,0 +1,137 @@
+import zlib
+from typing import Any, AsyncIterator, Iterable, Iterator, List, Optional, Type
+
+from pydantic import BaseModel
+
+from fastapi_easy_crud.crud.utils import list_adapter
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "msgpack": "application/x-msgpack",
+}
+
+
+class RowEncoder:
+    """
+    Encode rows batch by batch into one JSON array, JSON lines or a sequence of
+    MessagePack maps, so only one batch is held in memory at a time.
+    """
+
+    def __init__(self, schema: Type[BaseModel], output_format: str = "json") -> None:
+        if output_format not in MEDIA_TYPES:
+            raise ValueError(
+                f"unsupported format {output_format}, expected one of {list(MEDIA_TYPES)}"
+            )
+        if output_format == "msgpack" and msgpack is None:
+            raise ValueError("format msgpack needs the msgpack package")
+        self.schema = schema
+        self.output_format = output_format
+        self.media_type = MEDIA_TYPES[output_format]
+        self._started = False
+
+    def encode(self, rows: List[Any]) -> bytes:
+        if not rows:
+            return b""
+        adapter = list_adapter(self.schema)
+        models = adapter.validate_python(rows, from_attributes=True)
+        if self.output_format == "ndjson":
+            return b"".join(
+                model.model_dump_json().encode() + b"\n" for model in models
+            )
+        if self.output_format == "msgpack":
+            return b"".join(
+                msgpack.packb(model.model_dump(mode="json")) for model in models
+            )
+        # strip the brackets of the batch, they are written once per response
+        content = adapter.dump_json(models)[1:-1]
+        prefix = b"," if self._started else b"["
+        self._started = True
+        return prefix + content
+
+    def close(self) -> bytes:
+        if self.output_format != "json":
+            return b""
+        return b"]" if self._started else b"[]"
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """zstd (when installed) or gzip if the client accepts it, else None."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        coding, *params = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding)
+    if zstandard is not None and "zstd" in accepted:
+        return "zstd"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+class Compressor:
+    """Incremental gzip / zstd, a passthrough without an encoding."""
+
+    def __init__(self, encoding: Optional[str]) -> None:
+        self.encoding = encoding
+        if encoding == "zstd":
+            self._compressor: Any = zstandard.ZstdCompressor().compressobj()
+        elif encoding == "gzip":
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        else:
+            self._compressor = None
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress and flush `data`, the client can decode every chunk right away."""
+        if self._compressor is None or not data:
+            return data
+        if self.encoding == "zstd":
+            flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            flush_mode = zlib.Z_SYNC_FLUSH
+        return self._compressor.compress(data) + self._compressor.flush(flush_mode)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush() if self._compressor is not None else b""
+
+
+def iter_batches(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch: List[Any] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def aiter_batches(
+    rows: AsyncIterator[Any], size: int
+) -> AsyncIterator[List[Any]]:
+    batch: List[Any] = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,224 @@
+from functools import lru_cache
+from typing import (Any, Dict, FrozenSet, Iterable, Iterator, List, Optional,
+                    Sequence, Type)
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+from sqlalchemy import (PrimaryKeyConstraint, UniqueConstraint, inspect,
+                        select, tuple_)
+from sqlalchemy.orm import load_only
+
+
+@lru_cache(maxsize=None)
+def indexed_column_names(model: Type[Any]) -> FrozenSet[str]:
+    """
+    Attribute names of the columns that lead an index of the model's table,
+    i.e. the columns a WHERE / ORDER BY can use without a full scan.
+    """
+    table = model.__table__
+    leading = {list(index.columns)[0] for index in table.indexes}
+    leading.update(
+        list(constraint.columns)[0]
+        for constraint in table.constraints
+        if isinstance(constraint, (PrimaryKeyConstraint, UniqueConstraint))
+        and len(constraint.columns)
+    )
+    return frozenset(
+        attr.key for attr in inspect(model).column_attrs if attr.columns[0] in leading
+    )
+
+
+@lru_cache(maxsize=None)
+def column_names(model: Type[Any]) -> FrozenSet[str]:
+    return frozenset(attr.key for attr in inspect(model).column_attrs)
+
+
+@lru_cache(maxsize=None)
+def unique_keys(model: Type[Any]) -> FrozenSet[FrozenSet[str]]:
+    """
+    Attribute names of the primary key and of every unique constraint / index
+    of the model's table, the column sets an upsert can resolve conflicts on.
+    """
+    mapper = inspect(model)
+    table = model.__table__
+
+    def names(columns: Iterable[Any]) -> FrozenSet[str]:
+        return frozenset(
+            mapper.get_property_by_column(column).key for column in columns
+        )
+
+    keys = {names(mapper.primary_key)}
+    keys.update(
+        names(constraint.columns)
+        for constraint in table.constraints
+        if isinstance(constraint, UniqueConstraint)
+    )
+    keys.update(names(index.columns) for index in table.indexes if index.unique)
+    return frozenset(keys)
+
+
+def load_only_columns(model: Type[Any], fields: Iterable[str]) -> Any:
+    """`load_only` option for a sparse fieldset, unknown columns raise ValueError."""
+    fields = set(fields)
+    unknown = fields - column_names(model)
+    if unknown:
+        raise ValueError(
+            f"unknown fields {sorted(unknown)} for table {model.__tablename__}"
+        )
+    return load_only(*[getattr(model, name) for name in sorted(fields)])
+
+
+@lru_cache(maxsize=256)
+def project_schema(schema: Type[BaseModel], fields: FrozenSet[str]) -> Type[BaseModel]:
+    """Copy of `schema` restricted to `fields`, unknown fields raise ValueError."""
+    unknown = fields - set(schema.model_fields)
+    if unknown:
+        raise ValueError(f"unknown fields {sorted(unknown)} for {schema.__name__}")
+    return create_model(  # type: ignore
+        f"{schema.__name__}Projection",
+        __config__=ConfigDict(**{**schema.model_config, "from_attributes": True}),
+        **{
+            name: (info.annotation, info)
+            for name, info in schema.model_fields.items()
+            if name in fields
+        },
+    )
+
+
+@lru_cache(maxsize=256)
+def list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[schema])  # type: ignore
+
+
+def encode_model(obj_in: Any, exclude_unset: bool = False) -> Dict[str, Any]:
+    """Same output as jsonable_encoder, pydantic models are dumped in one pass."""
+    if isinstance(obj_in, BaseModel):
+        return obj_in.model_dump(
+            mode="json", by_alias=True, exclude_unset=exclude_unset
+        )
+    return jsonable_encoder(obj_in, exclude_unset=exclude_unset)
+
+
+def chunked(items: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(items), size):
+        end = start + size
+        yield items[start:end]
+
+
+def supports_executemany_returning(db: Any) -> bool:
+    """Whether the session's dialect can INSERT many rows with RETURNING."""
+    return bool(getattr(db.get_bind().dialect, "insert_executemany_returning", False))
+
+
+def supports_insert_returning(db: Any) -> bool:
+    return bool(getattr(db.get_bind().dialect, "insert_returning", False))
+
+
+def supports_update_returning(db: Any) -> bool:
+    return bool(getattr(db.get_bind().dialect, "update_returning", False))
+
+
+def supports_delete_returning(db: Any) -> bool:
+    return bool(getattr(db.get_bind().dialect, "delete_returning", False))
+
+
+def group_by_keys(rows: Iterable[Dict[str, Any]]) -> Dict[FrozenSet[str], List[Any]]:
+    """Split rows by their set of keys, each group can be one executemany."""
+    groups: Dict[FrozenSet[str], List[Any]] = {}
+    for row in rows:
+        groups.setdefault(frozenset(row), []).append(row)
+    return groups
+
+
+def upsert_statement(
+    db: Any,
+    model: Type[Any],
+    conflict_keys: Sequence[str],
+    update_columns: Sequence[str],
+) -> Any:
+    """
+    INSERT ... ON DUPLICATE KEY UPDATE on MySQL / MariaDB, which resolves the
+    conflict on any unique key and ignores `conflict_keys`, or INSERT ... ON
+    CONFLICT (conflict_keys) DO UPDATE on PostgreSQL / SQLite.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        stmt = mysql_insert(model)
+        # an empty update would be a syntax error, a no-op assignment keeps the row
+        columns = update_columns or conflict_keys[:1]
+        return stmt.on_duplicate_key_update(
+            {column: stmt.inserted[column] for column in columns}
+        )
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+        stmt = dialect_insert(model)
+        if not update_columns:
+            return stmt.on_conflict_do_nothing(index_elements=list(conflict_keys))
+        return stmt.on_conflict_do_update(
+            index_elements=list(conflict_keys),
+            set_={column: stmt.excluded[column] for column in update_columns},
+        )
+    raise NotImplementedError(f"upsert is not supported on the {dialect} dialect")
+
+
+def upsert_update_columns(
+    model: Type[Any],
+    keys: FrozenSet[str],
+    conflict_keys: Sequence[str],
+    update_columns: Optional[Sequence[str]],
+) -> List[str]:
+    """
+    Columns an upsert of rows setting `keys` overwrites: `update_columns`, or
+    every column the rows set but the conflict keys and the primary key. A
+    column the rows don't set is never overwritten, it would become NULL.
+    """
+    unknown = (keys | set(conflict_keys)) - column_names(model)
+    if unknown:
+        raise ValueError(
+            f"{sorted(unknown)} are not columns of table {model.__tablename__}"
+        )
+    if frozenset(conflict_keys) not in unique_keys(model):
+        raise ValueError(
+            f"{list(conflict_keys)} is not the primary key or a unique key "
+            f"of table {model.__tablename__}"
+        )
+    if update_columns is not None:
+        return [column for column in update_columns if column in keys]
+    primary_keys = {column.key for column in inspect(model).primary_key}
+    return sorted(keys - set(conflict_keys) - primary_keys)
+
+
+def select_by_keys(
+    model: Type[Any], rows: Sequence[Dict[str, Any]], keys: Sequence[str], size: int
+) -> Iterator[Any]:
+    """
+    SELECTs of the rows matching the `keys` values of `rows`, `size` per query.
+    Rows that don't set every key are skipped, see `batch_upsert`.
+    """
+    values = [tuple(row[key] for key in keys) for row in rows if set(keys) <= set(row)]
+    columns = [getattr(model, key) for key in keys]
+    for chunk in chunked(values, size):
+        if len(columns) == 1:
+            yield select(model).where(columns[0].in_([value[0] for value in chunk]))
+        else:
+            yield select(model).where(tuple_(*columns).in_(chunk))
+
+
+def unique_ids(ids: Iterable[Any]) -> List[Any]:
+    """`ids` without duplicates, in first-seen order. "1" and 1 are the same id."""
+    unique: Dict[str, Any] = {}
+    for id in ids:
+        unique.setdefault(str(id), id)
+    return list(unique.values())
+
+
+def order_by_ids(ids: Sequence[Any], db_objs: Iterable[Any]) -> List[Any]:
+    """`db_objs` in the order of `ids`, missing ids are skipped."""
+    by_id = {str(db_obj.id): db_obj for db_obj in db_objs}
+    return [by_id[key] for key in (str(id) for id in ids) if key in by_id]
@@ -0,0 +1,170 @@
+import asyncio
+import weakref
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from fastapi_easy_crud.crud.async_crud_base import AsyncCRUDBase
+from fastapi_easy_crud.crud.utils import encode_model
+
+# every write-behind queue of the process, started / drained by db_lifespan
+_queues: "weakref.WeakSet[AsyncWriteBehind]" = weakref.WeakSet()
+
+
+class AsyncWriteBehind:
+    """
+    Fire-and-forget inserts: `enqueue` buffers the rows in memory and returns,
+    a background task inserts them `flush_size` rows at a time, or whatever is
+    buffered `flush_interval` seconds after the first row arrived.
+
+    Once `max_queue_size` rows wait, `enqueue` blocks for up to
+    `enqueue_timeout` seconds and then raises `asyncio.QueueFull`. Rows of a
+    failed flush are logged and dropped, rows still buffered when the process
+    dies are lost: use it for data that tolerates it, like telemetry.
+    """
+
+    def __init__(
+        self,
+        crud_instance: AsyncCRUDBase,
+        max_queue_size: int = 100000,
+        flush_size: Optional[int] = None,
+        flush_interval: float = 0.05,
+        enqueue_timeout: Optional[float] = 1.0,
+        session_maker: Optional[Callable[[], async_sessionmaker[AsyncSession]]] = None,
+    ) -> None:
+        self.crud_instance = crud_instance
+        self.max_queue_size = max_queue_size
+        self.flush_size = flush_size or crud_instance.batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.session_maker = session_maker
+        self.queued = 0
+        self.rejected = 0
+        self.flushed = 0
+        self.failed = 0
+        self.flushes = 0
+        self._rows: List[Dict[str, Any]] = []
+        self._condition: Optional[asyncio.Condition] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._closing = False
+        _queues.add(self)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the flusher on the running event loop. Idempotent."""
+        if self.running:
+            return
+        self._closing = False
+        self._condition = asyncio.Condition()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop accepting rows and wait until the buffered ones are flushed."""
+        if self._task is None or self._condition is None:
+            return
+        async with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        await self._task
+        self._task = None
+
+    async def enqueue(self, objs: List[Any]) -> None:
+        if not self.running or self._closing or self._condition is None:
+            raise RuntimeError(
+                "write-behind queue is not running, start it from the app lifespan"
+            )
+        rows = [encode_model(obj_in, exclude_unset=True) for obj_in in objs]
+        if not rows:
+            return
+        async with self._condition:
+            if not self._has_room(len(rows)):
+                try:
+                    await asyncio.wait_for(
+                        self._condition.wait_for(lambda: self._has_room(len(rows))),
+                        self.enqueue_timeout,
+                    )
+                except asyncio.TimeoutError:
+                    self.rejected += len(rows)
+                    raise asyncio.QueueFull(
+                        f"{len(self._rows)} rows of "
+                        f"{self.crud_instance.model.__name__} are waiting to be written"
+                    ) from None
+            if self._closing:
+                raise RuntimeError("write-behind queue is shutting down")
+            self._rows.extend(rows)
+            self.queued += len(rows)
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "pending": len(self._rows),
+        }
+
+    def _has_room(self, size: int) -> bool:
+        # an enqueue bigger than the whole queue still goes through once it's empty
+        return (
+            self._closing
+            or not self._rows
+            or len(self._rows) + size <= self.max_queue_size
+        )
+
+    async def _run(self) -> None:
+        condition = self._condition
+        assert condition is not None
+        while True:
+            async with condition:
+                await condition.wait_for(lambda: self._rows or self._closing)
+                if not self._rows:
+                    return
+                if len(self._rows) < self.flush_size and not self._closing:
+                    try:
+                        await asyncio.wait_for(
+                            condition.wait_for(
+                                lambda: len(self._rows) >= self.flush_size
+                                or self._closing
+                            ),
+                            self.flush_interval,
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+                rows = self._rows[: self.flush_size]
+                del self._rows[: self.flush_size]
+                condition.notify_all()
+            await self._flush(rows)
+
+    async def _flush(self, rows: List[Dict[str, Any]]) -> None:
+        self.flushes += 1
+        try:
+            if self.session_maker is None:
+                from fastapi_easy_crud.db.async_db_deps import \
+                    get_async_session_maker
+
+                self.session_maker = get_async_session_maker
+            async with self.session_maker()() as db:
+                await self.crud_instance.insert_rows(db, rows=rows)
+        except Exception:
+            self.failed += len(rows)
+            logger.exception(
+                f"write-behind flush of {len(rows)} "
+                f"{self.crud_instance.model.__name__} rows failed, dropped"
+            )
+        else:
+            self.flushed += len(rows)
+
+
+def start_write_behind() -> None:
+    for queue in list(_queues):
+        queue.start()
+
+
+async def drain_write_behind() -> None:
+    await asyncio.gather(*(queue.stop() for queue in list(_queues)))
@@ -1,31 +1,33 @@
-from typing import AsyncGenerator
-from urllib.parse import quote_plus
-
-from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
-                                    create_async_engine)
-from sqlalchemy.pool import NullPool
-
-from fastapi_easy_crud.db.settings import settings
-
-engine_base_url = settings.sqlalchemy_engine
-password = settings.sqlalchemy_engine_password
-if not engine_base_url:
-    raise ValueError("SQLALCHEMY_ENGINE environment variable is empty")
-if not password:
-    raise ValueError("SQLALCHEMY_ENGINE_PASSWORD environment variable is empty")
-password_encoded = quote_plus(password)  # type: ignore
-engine_url = engine_base_url % password_encoded
-
-engine = create_async_engine(
-    engine_url,
-    pool_pre_ping=True,
-    poolclass=NullPool,
-    pool_recycle=3600,
-)
+from functools import lru_cache
+from typing import Any, AsyncGenerator, Optional
+
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
+                                    async_sessionmaker)
+
+from fastapi_easy_crud.db.engine import get_async_engine
+from fastapi_easy_crud.db.routing import (ReplicaSet, RoutingSession,
+                                          get_replica_set)
+from fastapi_easy_crud.db.transaction import async_transaction
+
+
+@lru_cache(maxsize=None)
+def _async_session_maker(
+    engine: AsyncEngine, replicas: Optional[ReplicaSet] = None
+) -> async_sessionmaker[AsyncSession]:
+    if replicas is not None:
+        # the routing happens in the sync session, on the replicas' sync engines
+        return async_sessionmaker(
+            bind=engine,
+            autoflush=False,
+            autocommit=False,
+            sync_session_class=RoutingSession,
+            replicas=replicas,
+        )
+    return async_sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
 
 def get_async_session_maker() -> async_sessionmaker[AsyncSession]:
-    return async_sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    return _async_session_maker(get_async_engine(), get_replica_set(is_async=True))
 
 
 async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
@@ -34,3 +36,17 @@ async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
             yield session
     finally:
         pass
+
+
+async def get_async_db_in_transaction() -> AsyncGenerator[AsyncSession, None]:
+    """Like get_async_db, CRUD calls of the request are committed once at the end."""
+    async with get_async_session_maker()() as session:
+        async with async_transaction(session):
+            yield session
+
+
+def __getattr__(name: str) -> Any:
+    # `engine` used to be created at import time, keep it reachable lazily
+    if name == "engine":
+        return get_async_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
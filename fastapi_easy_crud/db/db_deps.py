@@ -1,6 +1,7 @@
 from typing import Generator
 
 from fastapi_easy_crud.db.session import SessionLocal
+from fastapi_easy_crud.db.transaction import transaction
 
 
 def get_db() -> Generator:
@@ -9,3 +10,13 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+
+def get_db_in_transaction() -> Generator:
+    """Like get_db, CRUD calls of the request are committed once at the end."""
+    try:
+        db = SessionLocal()
+        with transaction(db):
+            yield db
+    finally:
+        db.close()
@@ -0,0 +1,143 @@
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Tuple
+from urllib.parse import quote_plus
+
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.pool import (AsyncAdaptedQueuePool, NullPool, QueuePool,
+                             StaticPool)
+
+from fastapi_easy_crud.db.settings import init, settings
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+SYNC_POOL_CLASSES = {"queue": QueuePool, "null": NullPool, "static": StaticPool}
+ASYNC_POOL_CLASSES = {
+    "queue": AsyncAdaptedQueuePool,
+    "null": NullPool,
+    "static": StaticPool,
+}
+
+# (is_async, name) -> engine, only valid inside the process that created it
+_engines: Dict[Tuple[bool, str], Any] = {}
+_engines_pid = os.getpid()
+_engines_lock = threading.Lock()
+
+
+def _ensure_settings() -> None:
+    # settings.init() was never called, fill the pool settings from env vars
+    if not hasattr(settings, "sqlalchemy_pool_class"):
+        init(
+            getattr(settings, "sqlalchemy_engine", None),
+            getattr(settings, "sqlalchemy_engine_password", None),
+        )
+
+
+def get_engine_url(name: str = "primary") -> str:
+    """`name` is "primary" or "replica-<n>", the n-th of sqlalchemy_replica_engines."""
+    _ensure_settings()
+    engine_base_url = settings.sqlalchemy_engine
+    if name.startswith("replica-"):
+        engine_base_url = settings.sqlalchemy_replica_engines[int(name[8:])]
+    password = settings.sqlalchemy_engine_password
+    if not engine_base_url:
+        raise ValueError("SQLALCHEMY_ENGINE environment variable is empty")
+    if not password:
+        raise ValueError("SQLALCHEMY_ENGINE_PASSWORD environment variable is empty")
+    password_encoded = quote_plus(password)
+    return engine_base_url % password_encoded
+
+
+def per_worker_pool_size() -> Dict[str, int]:
+    """
+    Split `sqlalchemy_max_connections` across `sqlalchemy_workers` processes,
+    keeping the pool_size / max_overflow ratio. Without a budget the configured
+    values are used as is.
+    """
+    pool_size = settings.sqlalchemy_pool_size
+    max_overflow = settings.sqlalchemy_max_overflow
+    budget = settings.sqlalchemy_max_connections
+    if budget:
+        per_worker = max(1, budget // max(1, settings.sqlalchemy_workers))
+        total = pool_size + max_overflow
+        pool_size = max(1, per_worker * pool_size // total) if total else per_worker
+        max_overflow = max(0, per_worker - pool_size)
+    return {"pool_size": pool_size, "max_overflow": max_overflow}
+
+
+def get_engine_kwargs(is_async: bool = False) -> Dict[str, Any]:
+    _ensure_settings()
+    pool_classes = ASYNC_POOL_CLASSES if is_async else SYNC_POOL_CLASSES
+    pool_class_name = settings.sqlalchemy_pool_class
+    if pool_class_name not in pool_classes:
+        raise ValueError(
+            f"unsupported SQLALCHEMY_POOL_CLASS {pool_class_name}, "
+            f"expected one of {list(pool_classes)}"
+        )
+    kwargs: Dict[str, Any] = {
+        "poolclass": pool_classes[pool_class_name],
+        "pool_pre_ping": settings.sqlalchemy_pool_pre_ping,
+    }
+    if pool_class_name == "queue":
+        kwargs.update(per_worker_pool_size())
+        kwargs["pool_timeout"] = settings.sqlalchemy_pool_timeout
+        kwargs["pool_recycle"] = settings.sqlalchemy_pool_recycle
+    return kwargs
+
+
+def create_db_engine(name: str = "primary", **kwargs: Any) -> Engine:
+    return create_engine(get_engine_url(name), **{**get_engine_kwargs(), **kwargs})
+
+
+def create_async_db_engine(name: str = "primary", **kwargs: Any) -> "AsyncEngine":
+    # imported here so sync-only processes never load the asyncio stack
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    return create_async_engine(
+        get_engine_url(name), **{**get_engine_kwargs(is_async=True), **kwargs}
+    )
+
+
+def _check_pid() -> None:
+    global _engines_pid
+    if _engines_pid == os.getpid():
+        return
+    # forked worker: drop the parent's pools without closing its sockets
+    for engine in _engines.values():
+        getattr(engine, "sync_engine", engine).dispose(close=False)
+    _engines.clear()
+    _engines_pid = os.getpid()
+
+
+def get_engine(name: str = "primary") -> Engine:
+    """Build the sync engine on first use and reuse it for the process."""
+    with _engines_lock:
+        _check_pid()
+        key = (False, name)
+        if key not in _engines:
+            _engines[key] = create_db_engine(name)
+        return _engines[key]
+
+
+def get_async_engine(name: str = "primary") -> "AsyncEngine":
+    """Build the async engine on first use and reuse it for the process."""
+    with _engines_lock:
+        _check_pid()
+        key = (True, name)
+        if key not in _engines:
+            _engines[key] = create_async_db_engine(name)
+        return _engines[key]
+
+
+async def dispose_engines() -> None:
+    """Close every pooled connection, call it on application shutdown."""
+    with _engines_lock:
+        _check_pid()
+        engines = list(_engines.items())
+        _engines.clear()
+    for (is_async, _), engine in engines:
+        if is_async:
+            await engine.dispose()
+        else:
+            engine.dispose()
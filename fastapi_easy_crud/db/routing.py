@@ -0,0 +1,137 @@
+import itertools
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import Engine, Select, event
+from sqlalchemy.engine import ExceptionContext
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+from fastapi_easy_crud.db.engine import (_ensure_settings, get_async_engine,
+                                         get_engine)
+from fastapi_easy_crud.db.settings import settings
+from fastapi_easy_crud.db.transaction import in_transaction
+
+# key in Session.info, once set every statement of the session goes to the primary
+USE_PRIMARY = "fastapi_easy_crud.use_primary"
+
+BALANCING_POLICIES = ("round_robin", "least_connections")
+
+
+class ReplicaSet:
+    """
+    Read replicas of the primary engine. A replica raising a disconnect error is
+    skipped for `retry_after` seconds, when none is healthy reads go to the
+    primary.
+    """
+
+    def __init__(
+        self,
+        engines: Sequence[Engine],
+        balancing: str = "round_robin",
+        retry_after: float = 30,
+    ) -> None:
+        if balancing not in BALANCING_POLICIES:
+            raise ValueError(
+                f"unsupported SQLALCHEMY_REPLICA_BALANCING {balancing}, "
+                f"expected one of {list(BALANCING_POLICIES)}"
+            )
+        self.engines = list(engines)
+        self.balancing = balancing
+        self.retry_after = retry_after
+        self.reads = 0
+        self.failures = 0
+        self._unhealthy_until: Dict[Engine, float] = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        for engine in self.engines:
+            event.listen(engine, "handle_error", self._on_error)
+
+    def _on_error(self, context: ExceptionContext) -> None:
+        if context.is_disconnect or context.connection is None:
+            with self._lock:
+                self.failures += 1
+                self._unhealthy_until[context.engine] = (
+                    time.monotonic() + self.retry_after
+                )
+
+    def healthy(self) -> list:
+        now = time.monotonic()
+        return [e for e in self.engines if self._unhealthy_until.get(e, 0) <= now]
+
+    def choose(self) -> Optional[Engine]:
+        engines = self.healthy()
+        if not engines:
+            return None
+        self.reads += 1
+        if self.balancing == "least_connections":
+            # NullPool / StaticPool don't count checked out connections
+            return min(engines, key=lambda e: getattr(e.pool, "checkedout", int)())
+        return engines[next(self._counter) % len(engines)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "replicas": len(self.engines),
+            "healthy": len(self.healthy()),
+            "reads": self.reads,
+            "failures": self.failures,
+        }
+
+
+@lru_cache(maxsize=None)
+def _replica_set(engines: Tuple[Engine, ...], balancing: str) -> ReplicaSet:
+    return ReplicaSet(engines, balancing)
+
+
+def get_replica_set(is_async: bool = False) -> Optional[ReplicaSet]:
+    """Replicas of the process engines, None without SQLALCHEMY_REPLICA_ENGINES."""
+    _ensure_settings()
+    urls = getattr(settings, "sqlalchemy_replica_engines", None) or []
+    engines = tuple(
+        (
+            get_async_engine(f"replica-{i}").sync_engine
+            if is_async
+            else get_engine(f"replica-{i}")
+        )
+        for i in range(len(urls))
+    )
+    if not engines:
+        return None
+    return _replica_set(engines, settings.sqlalchemy_replica_balancing)
+
+
+class RoutingSession(Session):
+    """
+    Send plain SELECTs to a replica and everything else to the primary: flushes,
+    INSERT / UPDATE / DELETE, SELECT ... FOR UPDATE and statements inside a
+    `transaction` scope. After the first write the session sticks to the primary
+    so it reads its own writes.
+    """
+
+    def __init__(self, *args: Any, replicas: Optional[ReplicaSet] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kwargs: Any) -> Any:
+        if self._flushing or isinstance(clause, UpdateBase):
+            # refreshes after the commit must not read a lagging replica
+            self.info[USE_PRIMARY] = True
+        elif (
+            self.replicas is not None
+            and not self._flushing
+            and not self.info.get(USE_PRIMARY)
+            and not in_transaction(self)
+            and isinstance(clause, Select)
+            and clause._for_update_arg is None
+        ):
+            replica = self.replicas.choose()
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+def use_primary(db: Any) -> None:
+    """Route every following statement of `db` (sync or async) to the primary."""
+    db.info[USE_PRIMARY] = True
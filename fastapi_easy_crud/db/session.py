@@ -1,23 +1,39 @@
-from urllib.parse import quote_plus
-
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
-
-from fastapi_easy_crud.db.settings import settings
-
-engine_base_url = settings.sqlalchemy_engine
-password = settings.sqlalchemy_engine_password
-if not engine_base_url:
-    raise ValueError("SQLALCHEMY_ENGINE environment variable is empty")
-if not password:
-    raise ValueError("SQLALCHEMY_ENGINE_PASSWORD environment variable is empty")
-password_encoded = quote_plus(password)  # type: ignore
-engine_url = engine_base_url % password_encoded
-engine = create_engine(
-    engine_url,
-    pool_pre_ping=True,
-    poolclass=NullPool,
-    pool_recycle=3600,
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+from functools import lru_cache
+from typing import Any, Optional
+
+from sqlalchemy import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from fastapi_easy_crud.db.engine import get_engine
+from fastapi_easy_crud.db.routing import (ReplicaSet, RoutingSession,
+                                          get_replica_set)
+
+
+@lru_cache(maxsize=None)
+def _session_maker(
+    engine: Engine, replicas: Optional[ReplicaSet] = None
+) -> sessionmaker[Session]:
+    if replicas is not None:
+        return sessionmaker(
+            autocommit=False,
+            autoflush=False,
+            bind=engine,
+            class_=RoutingSession,
+            replicas=replicas,
+        )
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def get_session_maker() -> sessionmaker[Session]:
+    return _session_maker(get_engine(), get_replica_set())
+
+
+def SessionLocal() -> Session:
+    return get_session_maker()()
+
+
+def __getattr__(name: str) -> Any:
+    # `engine` used to be created at import time, keep it reachable lazily
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -7,17 +7,106 @@ from pydantic import BaseModel
 class Settings(BaseModel):
     sqlalchemy_engine: Optional[str]
     sqlalchemy_engine_password: Optional[str]
+    # "queue" (default), "null" (pgbouncer-style external pooling) or "static"
+    sqlalchemy_pool_class: str
+    sqlalchemy_pool_size: int
+    sqlalchemy_max_overflow: int
+    sqlalchemy_pool_timeout: float
+    sqlalchemy_pool_recycle: int
+    # on by default, a high-throughput setup can turn it off
+    sqlalchemy_pool_pre_ping: bool
+    # total connection budget shared by all workers, split by `sqlalchemy_workers`
+    sqlalchemy_max_connections: Optional[int]
+    sqlalchemy_workers: int
+    # read replica urls, formatted with the same password as sqlalchemy_engine
+    sqlalchemy_replica_engines: List[str]
+    # "round_robin" or "least_connections"
+    sqlalchemy_replica_balancing: str
 
 
 settings = Settings
 
 
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if not value:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
 def init(
     sqlalchemy_engine: Optional[str] = None,
     sqlalchemy_engine_password: Optional[str] = None,
+    sqlalchemy_pool_class: Optional[str] = None,
+    sqlalchemy_pool_size: Optional[int] = None,
+    sqlalchemy_max_overflow: Optional[int] = None,
+    sqlalchemy_pool_timeout: Optional[float] = None,
+    sqlalchemy_pool_recycle: Optional[int] = None,
+    sqlalchemy_pool_pre_ping: Optional[bool] = None,
+    sqlalchemy_max_connections: Optional[int] = None,
+    sqlalchemy_workers: Optional[int] = None,
+    sqlalchemy_replica_engines: Optional[List[str]] = None,
+    sqlalchemy_replica_balancing: Optional[str] = None,
 ) -> None:
     global settings
     settings.sqlalchemy_engine = sqlalchemy_engine or os.getenv("SQLALCHEMY_ENGINE")
     settings.sqlalchemy_engine_password = sqlalchemy_engine_password or os.getenv(
         "SQLALCHEMY_ENGINE_PASSWORD"
     )
+    settings.sqlalchemy_pool_class = (
+        sqlalchemy_pool_class or os.getenv("SQLALCHEMY_POOL_CLASS") or "queue"
+    ).lower()
+    settings.sqlalchemy_pool_size = (
+        sqlalchemy_pool_size
+        if sqlalchemy_pool_size is not None
+        else _env_int("SQLALCHEMY_POOL_SIZE", 5)
+    )
+    settings.sqlalchemy_max_overflow = (
+        sqlalchemy_max_overflow
+        if sqlalchemy_max_overflow is not None
+        else _env_int("SQLALCHEMY_MAX_OVERFLOW", 10)
+    )
+    settings.sqlalchemy_pool_timeout = (
+        sqlalchemy_pool_timeout
+        if sqlalchemy_pool_timeout is not None
+        else float(os.getenv("SQLALCHEMY_POOL_TIMEOUT") or 30)
+    )
+    settings.sqlalchemy_pool_recycle = (
+        sqlalchemy_pool_recycle
+        if sqlalchemy_pool_recycle is not None
+        else _env_int("SQLALCHEMY_POOL_RECYCLE", 3600)
+    )
+    settings.sqlalchemy_pool_pre_ping = (
+        sqlalchemy_pool_pre_ping
+        if sqlalchemy_pool_pre_ping is not None
+        else _env_bool("SQLALCHEMY_POOL_PRE_PING", True)
+    )
+    settings.sqlalchemy_max_connections = (
+        sqlalchemy_max_connections
+        if sqlalchemy_max_connections is not None
+        else _env_int("SQLALCHEMY_MAX_CONNECTIONS", None)
+    )
+    settings.sqlalchemy_workers = (
+        sqlalchemy_workers
+        if sqlalchemy_workers is not None
+        else _env_int("WEB_CONCURRENCY", 1)
+    )
+    settings.sqlalchemy_replica_engines = (
+        sqlalchemy_replica_engines
+        if sqlalchemy_replica_engines is not None
+        else [
+            url
+            for url in (os.getenv("SQLALCHEMY_REPLICA_ENGINES") or "").split(",")
+            if url
+        ]
+    )
+    settings.sqlalchemy_replica_balancing = (
+        sqlalchemy_replica_balancing
+        or os.getenv("SQLALCHEMY_REPLICA_BALANCING")
+        or "round_robin"
+    )
@@ -0,0 +1,82 @@
+from contextlib import asynccontextmanager, contextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Iterator
+
+from sqlalchemy.orm import Session
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+# keys in Session.info, shared by the sync and async session of a transaction
+DEFER_COMMIT = "fastapi_easy_crud.defer_commit"
+AFTER_COMMIT = "fastapi_easy_crud.after_commit"
+
+
+def in_transaction(db: Any) -> bool:
+    """Whether CRUD methods should flush instead of commit on this session."""
+    return bool(db.info.get(DEFER_COMMIT))
+
+
+def after_commit(db: Any, callback: Callable[[], None]) -> None:
+    """
+    Run `callback` once the enclosing transaction scope ends, or now. It runs
+    on rollback too: meant for cache invalidations, right either way.
+    """
+    if in_transaction(db):
+        db.info.setdefault(AFTER_COMMIT, []).append(callback)
+    else:
+        callback()
+
+
+def _run_after_scope(db: Any) -> None:
+    for callback in db.info.pop(AFTER_COMMIT, []):
+        callback()
+
+
+@contextmanager
+def transaction(db: Session, savepoint: bool = False) -> Iterator[Session]:
+    """
+    Defer the commits of every CRUD call made with `db` inside the block and
+    commit once at the end, rollback on error. Nested scopes join the outer one,
+    or use a SAVEPOINT with `savepoint=True`.
+    """
+    if in_transaction(db):
+        if savepoint:
+            with db.begin_nested():
+                yield db
+        else:
+            yield db
+        return
+    db.info[DEFER_COMMIT] = True
+    try:
+        yield db
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        db.info.pop(DEFER_COMMIT, None)
+        _run_after_scope(db)
+
+
+@asynccontextmanager
+async def async_transaction(
+    db: "AsyncSession", savepoint: bool = False
+) -> AsyncIterator["AsyncSession"]:
+    """Async counterpart of `transaction`."""
+    if in_transaction(db):
+        if savepoint:
+            async with db.begin_nested():
+                yield db
+        else:
+            yield db
+        return
+    db.info[DEFER_COMMIT] = True
+    try:
+        yield db
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+    finally:
+        db.info.pop(DEFER_COMMIT, None)
+        _run_after_scope(db)
@@ -0,0 +1,24 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from fastapi import FastAPI
+
+from fastapi_easy_crud.crud.write_behind import (drain_write_behind,
+                                                 start_write_behind)
+from fastapi_easy_crud.db.engine import dispose_engines
+
+
+@asynccontextmanager
+async def db_lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Usage: `FastAPI(lifespan=db_lifespan)`, runs the write-behind queues and
+    on shutdown drains them and disposes the pooled engines.
+    """
+    start_write_behind()
+    try:
+        yield
+    finally:
+        try:
+            await drain_write_behind()
+        finally:
+            await dispose_engines()
@@ -0,0 +1,274 @@
+import bisect
+import heapq
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import anyio
+from sqlalchemy import Engine, event
+from sqlalchemy.util import greenlet_spawn
+
+from fastapi_easy_crud.crud.statements import (current_batch,
+                                               statement_cache_stats,
+                                               track_statement_cache)
+
+# prometheus client defaults, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        # the last slot counts the observations above every bucket (+Inf)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class QueryStats:
+    """
+    DB statements run on behalf of one request, filled by SQLAlchemy events:
+    totals, executions and time per SQL text, the `keep_slowest` slowest ones,
+    and the SELECTs slower than `explain_threshold` seconds, explained by
+    `explain_queued` once the request is done.
+    """
+
+    __slots__ = (
+        "count",
+        "seconds",
+        "statements",
+        "slowest",
+        "keep_slowest",
+        "explain_threshold",
+        "plans",
+        "explain_queue",
+    )
+
+    def __init__(
+        self, keep_slowest: int = 3, explain_threshold: Optional[float] = None
+    ) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        # SQL text -> [executions, seconds, executions as a chunk of a batch]
+        self.statements: Dict[str, List[Any]] = {}
+        # min-heap of (seconds, SQL text)
+        self.slowest: List[Tuple[float, str]] = []
+        self.keep_slowest = keep_slowest
+        self.explain_threshold = explain_threshold
+        # SQL text -> (seconds, plan), each statement is explained once
+        self.plans: Dict[str, Tuple[float, str]] = {}
+        # SQL text -> (seconds, engine, parameters), waiting for `explain_queued`
+        self.explain_queue: Dict[str, Tuple[float, Engine, Any]] = {}
+
+    def record(self, statement: str, seconds: float, chunk: bool = False) -> None:
+        self.count += 1
+        self.seconds += seconds
+        entry = self.statements.get(statement)
+        if entry is None:
+            self.statements[statement] = [1, seconds, int(chunk)]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += chunk
+        if len(self.slowest) < self.keep_slowest:
+            heapq.heappush(self.slowest, (seconds, statement))
+        elif self.slowest and seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (seconds, statement))
+
+    def slowest_statements(self) -> List[Tuple[float, str]]:
+        return sorted(self.slowest, reverse=True)
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int, float]]:
+        """
+        (SQL text, executions, seconds) of the statements run at least
+        `threshold` times, with different parameters that's the N+1 pattern.
+        The chunks of a batch CRUD method are not counted as repetitions.
+        """
+        repeated = [
+            (statement, count - chunks, seconds)
+            for statement, (count, seconds, chunks) in self.statements.items()
+            if count - chunks >= threshold
+        ]
+        return sorted(repeated, key=lambda item: item[1], reverse=True)
+
+
+# set by the middleware, copied into the worker threads of sync CRUD calls
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "current_query_stats", default=None
+)
+
+_QUERY_START = "fastapi_easy_crud.query_start"
+# set on the connection while it runs an EXPLAIN, which is not counted
+_EXPLAINING = "fastapi_easy_crud.explaining"
+
+
+def _before_cursor_execute(conn: Any, *args: Any) -> None:
+    if current_query_stats.get() is not None and not conn.info.get(_EXPLAINING):
+        conn.info.setdefault(_QUERY_START, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    stats = current_query_stats.get()
+    starts = conn.info.get(_QUERY_START)
+    if stats is None or not starts or conn.info.get(_EXPLAINING):
+        return
+    seconds = time.perf_counter() - starts.pop()
+    # a statement seen before in the same batch method call is one of its chunks
+    batch = current_batch.get()
+    chunk = batch is not None and statement in batch
+    if batch is not None:
+        batch.add(statement)
+    stats.record(statement, seconds, chunk)
+    if (
+        stats.explain_threshold is not None
+        and seconds >= stats.explain_threshold
+        and not executemany
+        and statement not in stats.explain_queue
+        and statement.lstrip()[:6].upper() == "SELECT"
+    ):
+        # not on this connection: it may still be streaming the result rows
+        stats.explain_queue[statement] = (seconds, conn.engine, parameters)
+
+
+def _explain(engine: Engine, statement: str, parameters: Any) -> str:
+    """The plan of `statement` with the same parameters, on a pooled connection."""
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    try:
+        with engine.connect() as conn:
+            conn.info[_EXPLAINING] = True
+            try:
+                rows = conn.exec_driver_sql(prefix + statement, parameters).fetchall()
+            finally:
+                conn.info.pop(_EXPLAINING, None)
+    except Exception as e:
+        return f"<EXPLAIN failed: {e}>"
+    return "\n".join(" | ".join(str(value) for value in row) for row in rows)
+
+
+async def explain_queued(stats: QueryStats) -> None:
+    """Fill `stats.plans` with the plans of the queued slow statements."""
+    queue, stats.explain_queue = stats.explain_queue, {}
+    for statement, (seconds, engine, parameters) in queue.items():
+        if engine.dialect.is_async:
+            plan = await greenlet_spawn(_explain, engine, statement, parameters)
+        else:
+            plan = await anyio.to_thread.run_sync(
+                _explain, engine, statement, parameters
+            )
+        stats.plans[statement] = (seconds, plan)
+
+
+def instrument_sqlalchemy() -> None:
+    """Count statements and DB time of every engine, sync or async. Idempotent."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    track_statement_cache()
+
+
+class MetricsRegistry:
+    """
+    Per process request metrics, keyed by method and route template so path
+    parameters don't blow up the label cardinality. With several workers each
+    process exports its own series.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.in_flight = 0
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.responses: Dict[Tuple[str, str, int], int] = {}
+        self.db_queries: Dict[Tuple[str, str], int] = {}
+        self.db_seconds: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def observe(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        query_stats: Optional[QueryStats] = None,
+    ) -> None:
+        key = (method, route)
+        with self._lock:
+            histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+            status_key = (method, route, status)
+            self.responses[status_key] = self.responses.get(status_key, 0) + 1
+            if query_stats is not None:
+                self.db_queries[key] = self.db_queries.get(key, 0) + query_stats.count
+                self.db_seconds[key] = (
+                    self.db_seconds.get(key, 0.0) + query_stats.seconds
+                )
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        lines: List[str] = [
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        with self._lock:
+            for (method, route), histogram in self.latency.items():
+                labels = f'method="{method}",route="{route}"'
+                cumulative = 0
+                for bound, count in zip(self.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(
+                        f"http_request_duration_seconds_bucket"
+                        f'{{{labels},le="{bound}"}} {cumulative}'
+                    )
+                lines.append(
+                    f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} '
+                    f"{histogram.count}"
+                )
+                lines.append(
+                    f"http_request_duration_seconds_sum{{{labels}}} {histogram.sum}"
+                )
+                lines.append(
+                    f"http_request_duration_seconds_count{{{labels}}} {histogram.count}"
+                )
+            lines.append("# TYPE http_responses_total counter")
+            for (method, route, status), count in self.responses.items():
+                lines.append(
+                    f'http_responses_total{{method="{method}",route="{route}",'
+                    f'status="{status}"}} {count}'
+                )
+            lines.append("# TYPE db_queries_total counter")
+            for (method, route), count in self.db_queries.items():
+                lines.append(
+                    f'db_queries_total{{method="{method}",route="{route}"}} {count}'
+                )
+            lines.append("# TYPE db_query_duration_seconds_total counter")
+            for (method, route), seconds in self.db_seconds.items():
+                lines.append(
+                    f'db_query_duration_seconds_total{{method="{method}",'
+                    f'route="{route}"}} {seconds}'
+                )
+        lines.append("# TYPE db_statement_cache_total counter")
+        cache_stats = statement_cache_stats.stats()
+        for result in ("hits", "misses", "uncached"):
+            lines.append(
+                f'db_statement_cache_total{{result="{result}"}} {cache_stats[result]}'
+            )
+        return "\n".join(lines) + "\n"
+
+
+# used by every BasicLogMetricsMiddleWare without an explicit registry
+default_registry = MetricsRegistry()
@@ -1,38 +1,160 @@
+import random
 import time
-from typing import Any, Callable
+from typing import List, Optional
 from uuid import uuid4
 
 from loguru import logger
-from starlette.concurrency import iterate_in_threadpool
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from starlette.datastructures import MutableHeaders
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from fastapi_easy_crud.fastapi.metrics import (MetricsRegistry, QueryStats,
+                                               current_query_stats,
+                                               default_registry,
+                                               explain_queued,
+                                               instrument_sqlalchemy)
 
-async def log_response_body(request_id: str, url: str, response) -> Any:  # type: ignore
-    response_body = [chunk async for chunk in response.body_iterator]
-    response.body_iterator = iterate_in_threadpool(iter(response_body))
-    logger.info(
-        f"id: {request_id}, url: {url}, response_body={response_body[0].decode()}"
-    )
-    return response
 
+class BasicLogMetricsMiddleWare:
+    """
+    Pure ASGI middleware logging one line per request and recording per route
+    latency histograms, in-flight requests and DB statement count / time into
+    `registry`, exported in the Prometheus text format at `metrics_path` if set.
+    Bodies of error responses are logged for a `log_body_sample_rate` fraction
+    of them, truncated to `log_body_max_bytes`.
 
-class BasicLogMetricsMiddleWare(BaseHTTPMiddleware):
-    def __init__(self, app):
-        super().__init__(app)
+    Per request it also logs a warning for statements run `n_plus_one_threshold`
+    times or more (suspected N+1, the chunks of the batch CRUD methods aside)
+    and, with `slow_query_threshold` seconds, for the slowest statements above
+    it, with their EXPLAIN plan when `explain_slow_queries`, run on another
+    pooled connection once the response is sent. `db_stats_headers` adds X-DB-Queries and a
+    Server-Timing db entry to the responses.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        registry: Optional[MetricsRegistry] = None,
+        metrics_path: Optional[str] = None,
+        log_body_sample_rate: float = 0.1,
+        log_body_max_bytes: int = 2048,
+        n_plus_one_threshold: Optional[int] = 5,
+        slow_query_threshold: Optional[float] = None,
+        explain_slow_queries: bool = False,
+        db_stats_headers: bool = False,
+    ) -> None:
+        self.app = app
+        self.registry = registry or default_registry
+        self.metrics_path = metrics_path
+        self.log_body_sample_rate = log_body_sample_rate
+        self.log_body_max_bytes = log_body_max_bytes
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.slow_query_threshold = slow_query_threshold
+        self.explain_slow_queries = explain_slow_queries
+        self.db_stats_headers = db_stats_headers
+        instrument_sqlalchemy()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if self.metrics_path and scope["path"] == self.metrics_path:
+            response = PlainTextResponse(
+                self.registry.render(),
+                media_type="text/plain; version=0.0.4; charset=utf-8",
+            )
+            await response(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Any:
-        url = request.url.path
         request_id = str(uuid4())
-        logger.info(f"id: {request_id}, url: {url}, request: {request.__dict__}")
-        start_time = time.time()
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        response.headers["X-Process-Time"] = str(process_time)
-        response.headers["X-Request-Id"] = request_id
-        logger.info(f"id: {request_id}, url: {url}, response: {response.__dict__}")
-        if response.status_code >= 400:
-            response = await log_response_body(
-                url=url, request_id=request_id, response=response
+        method = scope["method"]
+        url = scope["path"]
+        status = 500
+        body: Optional[List[bytes]] = None
+        body_size = 0
+        query_stats = QueryStats(
+            explain_threshold=(
+                self.slow_query_threshold if self.explain_slow_queries else None
+            )
+        )
+        token = current_query_stats.set(query_stats)
+        self.registry.in_flight += 1
+        start_time = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, body, body_size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers["X-Process-Time"] = str(time.perf_counter() - start_time)
+                headers["X-Request-Id"] = request_id
+                if self.db_stats_headers:
+                    # statements of a streamed body run after the headers are sent
+                    headers["X-DB-Queries"] = str(query_stats.count)
+                    headers.append(
+                        "Server-Timing",
+                        f"db;dur={query_stats.seconds * 1000:.2f}"
+                        f';desc="{query_stats.count} queries"',
+                    )
+                if status >= 400 and random.random() < self.log_body_sample_rate:
+                    body = []
+            elif (
+                message["type"] == "http.response.body"
+                and body is not None
+                and body_size < self.log_body_max_bytes
+            ):
+                chunk = message.get("body", b"")[: self.log_body_max_bytes - body_size]
+                body.append(chunk)
+                body_size += len(chunk)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            process_time = time.perf_counter() - start_time
+            self.registry.in_flight -= 1
+            current_query_stats.reset(token)
+            await explain_queued(query_stats)
+            # the matched route template, set on the scope by the router
+            route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            self.registry.observe(method, route, status, process_time, query_stats)
+            logger.info(
+                f"id: {request_id}, {method} {url} {status} in {process_time:.4f}s, "
+                f"db: {query_stats.count} queries in {query_stats.seconds:.4f}s"
+            )
+            self.log_query_stats(request_id, method, url, query_stats)
+            if body is not None:
+                logger.info(
+                    f"id: {request_id}, url: {url}, "
+                    f"response_body={b''.join(body).decode(errors='replace')}"
+                )
+
+    def log_query_stats(
+        self, request_id: str, method: str, url: str, query_stats: QueryStats
+    ) -> None:
+        if self.n_plus_one_threshold:
+            for statement, count, seconds in query_stats.repeated(
+                self.n_plus_one_threshold
+            ):
+                logger.warning(
+                    f"id: {request_id}, {method} {url}, suspected N+1: {count} runs "
+                    f"in {seconds:.4f}s of {_truncate(statement)}"
+                )
+        if self.slow_query_threshold is None:
+            return
+        for seconds, statement in query_stats.slowest_statements():
+            if seconds >= self.slow_query_threshold:
+                logger.warning(
+                    f"id: {request_id}, {method} {url}, slow query in {seconds:.4f}s: "
+                    f"{_truncate(statement)}"
+                )
+        for statement, (seconds, plan) in query_stats.plans.items():
+            logger.warning(
+                f"id: {request_id}, {method} {url}, plan of the {seconds:.4f}s query "
+                f"{_truncate(statement)}:\n{plan}"
             )
-        return response
+
+
+def _truncate(statement: str, size: int = 500) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= size else statement[:size] + "..."
@@ -1,26 +1,198 @@
-from typing import List
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Set, Tuple, get_args, get_origin
 
 from fastapi import FastAPI
+from fastapi.dependencies.utils import get_flat_dependant
 from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute
 from fastapi.security.base import SecurityBase
+from loguru import logger
+from pydantic import BaseModel
+from starlette.requests import Request
+from starlette.responses import Response
 
+# key of the dumped schema holding the hash of the routes it was generated from
+ROUTES_HASH = "x-routes-hash"
 
-def add_secure_setting(app: FastAPI, security_list: List[SecurityBase]) -> None:
-    def decorate_openapi():
-        openapi_schema = app.openapi()
-        if "components" not in openapi_schema:
-            openapi_schema["components"] = {}
-        if "securitySchemes" not in openapi_schema["components"]:
-            openapi_schema["components"]["securitySchemes"] = {}
-        if "security" not in openapi_schema:
-            openapi_schema["security"] = []
-        for scheme in security_list:
-            key = scheme.scheme_name
-            value = scheme.model
-            openapi_schema["components"]["securitySchemes"][key] = jsonable_encoder(
-                value, by_alias=True, exclude_none=True
-            )
-            openapi_schema["security"].append({key: []})
-        return openapi_schema
+PARAM_KINDS = (
+    "path_params",
+    "query_params",
+    "header_params",
+    "cookie_params",
+    "body_params",
+)
+
+
+def _type_key(tp: Any, seen: Set[type]) -> Any:
+    """What the schema of `tp` is generated from, pydantic models field by field."""
+    if isinstance(tp, type) and issubclass(tp, BaseModel):
+        if tp in seen:
+            return tp.__qualname__
+        seen.add(tp)
+        return (
+            tp.__qualname__,
+            tuple(
+                (
+                    name,
+                    _type_key(field.annotation, seen),
+                    repr(field.default),
+                    field.alias,
+                )
+                for name, field in tp.model_fields.items()
+            ),
+        )
+    args = get_args(tp)
+    if args:
+        return (repr(get_origin(tp)), tuple(_type_key(arg, seen) for arg in args))
+    return repr(tp)
+
+
+def _route_key(route: APIRoute) -> Tuple:
+    seen: Set[type] = set()
+    dependant = get_flat_dependant(route.dependant, skip_repeats=True)
+    params = tuple(
+        (
+            kind,
+            field.alias,
+            field.required,
+            _type_key(field.field_info.annotation, seen),
+        )
+        for kind in PARAM_KINDS
+        for field in getattr(dependant, kind)
+    )
+    return (
+        route.path_format,
+        tuple(sorted(route.methods)),
+        route.operation_id or route.unique_id,
+        route.summary,
+        route.description,
+        tuple(str(tag) for tag in route.tags),
+        route.status_code,
+        route.deprecated,
+        repr(route.responses),
+        params,
+        _type_key(route.response_model, seen),
+    )
+
+
+def _routes_hash(app: FastAPI) -> str:
+    """
+    Hash of the app info and the routes in the schema, their parameters and
+    models included: it changes with the schema, without generating it.
+    """
+    key = (
+        app.title,
+        app.version,
+        app.openapi_version,
+        app.summary,
+        app.description,
+        repr(app.servers),
+        tuple(
+            _route_key(route)
+            for route in app.routes
+            if isinstance(route, APIRoute) and route.include_in_schema
+        ),
+    )
+    return hashlib.sha256(repr(key).encode()).hexdigest()
+
+
+def _encode(openapi_schema: Dict[str, Any]) -> bytes:
+    # same encoding as the JSONResponse fastapi serves the schema with
+    return json.dumps(
+        openapi_schema, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def add_security_schemes(
+    openapi_schema: Dict[str, Any], security_list: List[SecurityBase]
+) -> Dict[str, Any]:
+    if "components" not in openapi_schema:
+        openapi_schema["components"] = {}
+    if "securitySchemes" not in openapi_schema["components"]:
+        openapi_schema["components"]["securitySchemes"] = {}
+    if "security" not in openapi_schema:
+        openapi_schema["security"] = []
+    for scheme in security_list:
+        key = scheme.scheme_name
+        value = scheme.model
+        openapi_schema["components"]["securitySchemes"][key] = jsonable_encoder(
+            value, by_alias=True, exclude_none=True
+        )
+        openapi_schema["security"].append({key: []})
+    return openapi_schema
 
-    app.openapi_schema = decorate_openapi()
+
+def dump_openapi(app: FastAPI, path: str) -> None:
+    """Build step: write the final schema of `app`, to be loaded with `schema_path`."""
+    openapi_schema = {**app.openapi(), ROUTES_HASH: _routes_hash(app)}
+    with open(path, "wb") as f:
+        f.write(_encode(openapi_schema))
+
+
+def add_secure_setting(
+    app: FastAPI,
+    security_list: List[SecurityBase],
+    schema_path: Optional[str] = None,
+    lazy: bool = False,
+) -> None:
+    """
+    Add `security_list` to the schema of `app` and serve it as pre-encoded bytes.
+    The schema is read from `schema_path` when it was dumped for the same routes,
+    else generated now, or on the first /openapi.json request with `lazy=True`.
+    It is generated again only when the routes of `app` change.
+    """
+    generate_openapi = app.openapi
+    cache: Dict[str, Any] = {"count": None, "hash": None, "schema": None, "body": None}
+
+    def openapi() -> Dict[str, Any]:
+        # routes are only ever added, hash them again when their number changes
+        if cache["count"] != len(app.routes):
+            cache["count"] = len(app.routes)
+            routes_hash = _routes_hash(app)
+            if cache["hash"] != routes_hash:
+                app.openapi_schema = None
+                cache.update(
+                    hash=routes_hash,
+                    schema=add_security_schemes(generate_openapi(), security_list),
+                    body=None,
+                )
+        return cache["schema"]
+
+    def openapi_body() -> bytes:
+        openapi()
+        if cache["body"] is None:
+            cache["body"] = _encode(cache["schema"])
+        return cache["body"]
+
+    app.openapi = openapi  # type: ignore
+    if app.openapi_url:
+
+        async def openapi_endpoint(request: Request) -> Response:
+            return Response(openapi_body(), media_type="application/json")
+
+        app.router.routes = [
+            route
+            for route in app.router.routes
+            if getattr(route, "path", None) != app.openapi_url
+        ]
+        app.add_route(app.openapi_url, openapi_endpoint, include_in_schema=False)
+
+    if schema_path and os.path.exists(schema_path):
+        with open(schema_path, "rb") as f:
+            body = f.read()
+        openapi_schema = json.loads(body)
+        routes_hash = _routes_hash(app)
+        if openapi_schema.get(ROUTES_HASH) == routes_hash:
+            app.openapi_schema = openapi_schema
+            cache.update(
+                count=len(app.routes),
+                hash=routes_hash,
+                schema=openapi_schema,
+                body=body,
+            )
+        else:
+            logger.warning(f"{schema_path} is outdated, regenerating the schema")
+    if not lazy:
+        app.openapi_schema = openapi()
@@ -0,0 +1,105 @@
+import asyncio
+from typing import Any, AsyncIterator, Iterator
+
+import pytest
+from sqlalchemy.orm import Session
+
+from fastapi_easy_crud.db import settings
+from fastapi_easy_crud.db.db_base import CommonBase
+from fastapi_easy_crud.db.engine import dispose_engines, get_engine
+from tests.models import Item, ItemCreate, ItemGet, ItemUpdate
+
+
+def sqlite_url(path: Any, driver: str = "sqlite") -> str:
+    # the password is formatted into the url, "pw" ends the file name
+    return f"{driver}:///{path}/test.db%s"
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture
+def database(tmp_path: Any) -> Iterator[Any]:
+    """A fresh SQLite database per test, with the tables of `Item`."""
+    settings.init(sqlite_url(tmp_path), "pw", sqlalchemy_replica_engines=[])
+    CommonBase.metadata.create_all(get_engine())
+    yield tmp_path
+    asyncio.run(dispose_engines())
+
+
+@pytest.fixture
+def db(database: Any) -> Iterator[Session]:
+    from fastapi_easy_crud.db.session import SessionLocal
+
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+async def async_db(database: Any) -> AsyncIterator[Any]:
+    from fastapi_easy_crud.db.async_db_deps import get_async_session_maker
+
+    # the sync engine is built already, the async one reads the aiosqlite url
+    settings.settings.sqlalchemy_engine = sqlite_url(database, "sqlite+aiosqlite")
+    async with get_async_session_maker()() as session:
+        yield session
+    await dispose_engines()
+
+
+@pytest.fixture
+async def client(request: Any, database: Any) -> AsyncIterator[Any]:
+    """
+    An httpx client of an app serving `Item` under /sync and /async, the
+    BaseAPI arguments can be overridden by parametrizing it indirectly.
+    """
+    import httpx
+    from fastapi import APIRouter, FastAPI
+
+    from fastapi_easy_crud.crud.async_crud_base import AsyncCRUDBase
+    from fastapi_easy_crud.crud.async_restful_api_base import AsyncBaseAPI
+    from fastapi_easy_crud.crud.crud_base import CRUDBase
+    from fastapi_easy_crud.crud.restful_api_base import BaseAPI
+
+    settings.settings.sqlalchemy_engine = sqlite_url(database, "sqlite+aiosqlite")
+    options = {
+        "get_schema_type": ItemGet,
+        "create_schema_type": ItemCreate,
+        "update_schema_type": ItemUpdate,
+        **getattr(request, "param", {}),
+    }
+    app = FastAPI()
+    for prefix, api_cls, crud_cls in (
+        ("/sync", BaseAPI, CRUDBase),
+        ("/async", AsyncBaseAPI, AsyncCRUDBase),
+    ):
+        router = APIRouter(prefix=prefix)
+        api = api_cls(prefix, [prefix], crud_cls(Item), **options)
+        api.init_router(router)
+        api.enhance_router(router)
+        app.include_router(router)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+    await dispose_engines()
+
+
+@pytest.fixture(params=["returning", "no_returning"])
+def returning(request: Any, monkeypatch: Any) -> str:
+    """Run a test with and without RETURNING support, like on MySQL."""
+    if request.param == "no_returning":
+        from sqlalchemy.dialects.sqlite.base import SQLiteDialect
+
+        # the ORM flush too, it would otherwise fetch server defaults with
+        # RETURNING through insertmanyvalues
+        for name in (
+            "insert_returning",
+            "update_returning",
+            "delete_returning",
+            "insert_executemany_returning",
+            "insert_executemany_returning_sort_by_parameter_order",
+            "use_insertmanyvalues",
+        ):
+            monkeypatch.setattr(SQLiteDialect, name, False)
+    return request.param
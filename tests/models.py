@@ -0,0 +1,42 @@
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import TIMESTAMP, Column, Integer, String, Text, text
+
+from fastapi_easy_crud.db.db_base import CommonBase
+
+
+class Item(CommonBase):
+    name = Column(String(64), index=True)
+    rank = Column(Integer, index=True, nullable=False, server_default=text("0"))
+    qty = Column(Integer)
+    blob = Column(Text)
+    # sqlite has no ON UPDATE CURRENT_TIMESTAMP
+    last_modified_time = Column(
+        TIMESTAMP, nullable=False, server_default=text("CURRENT_TIMESTAMP")
+    )
+
+
+class ItemGet(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: Optional[str] = None
+    rank: Optional[int] = None
+    qty: Optional[int] = None
+    blob: Optional[str] = None
+
+
+class ItemCreate(BaseModel):
+    id: Optional[int] = None
+    name: Optional[str] = None
+    rank: Optional[int] = None
+    qty: Optional[int] = None
+    blob: Optional[str] = None
+
+
+class ItemUpdate(BaseModel):
+    name: Optional[str] = None
+    rank: Optional[int] = None
+    qty: Optional[int] = None
+    blob: Optional[str] = None
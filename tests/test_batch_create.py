@@ -0,0 +1,22 @@
+import pytest
+
+from fastapi_easy_crud.crud.async_crud_base import AsyncCRUDBase
+from fastapi_easy_crud.crud.crud_base import CRUDBase
+from tests.models import Item, ItemCreate
+
+
+def objs():
+    return [ItemCreate(id=50, name="a"), ItemCreate(id=10, name="b"), ItemCreate(id=30)]
+
+
+def test_batch_create_keeps_input_order(db, returning):
+    models = CRUDBase(Item, batch_size=2).batch_create(db, objs=objs())
+    assert [(m.id, m.name) for m in models] == [(50, "a"), (10, "b"), (30, None)]
+    assert all(m.create_time is not None for m in models)
+
+
+@pytest.mark.anyio
+async def test_async_batch_create_keeps_input_order(async_db, returning):
+    models = await AsyncCRUDBase(Item, batch_size=2).batch_create(async_db, objs=objs())
+    assert [(m.id, m.name) for m in models] == [(50, "a"), (10, "b"), (30, None)]
+    assert all(m.create_time is not None for m in models)
@@ -0,0 +1,62 @@
+import pytest
+from pydantic import BaseModel
+from sqlalchemy.orm.exc import StaleDataError
+
+from fastapi_easy_crud.crud.crud_base import CRUDBase
+from tests.models import Item, ItemCreate
+
+
+def test_batch_update_by_ids(db, returning):
+    crud = CRUDBase(Item)
+    rows = crud.batch_create(db, objs=[ItemCreate(name=f"n{i}") for i in range(3)])
+    ids = [row.id for row in rows]
+    updated = crud.batch_update_by_ids(db, ids=ids[:2], obj_in={"qty": 7})
+    assert sorted(row.id for row in updated) == ids[:2]
+    assert [row.qty for row in crud.batch_get(db, ids=ids)] == [7, 7, None]
+
+
+def test_batch_update_unknown_field_is_rejected(db):
+    crud = CRUDBase(Item)
+    with pytest.raises(ValueError, match="nope"):
+        crud.batch_update_by_ids(db, ids=[1], obj_in={"nope": 1})
+    with pytest.raises(ValueError, match="nope"):
+        crud.batch_update_by_ids_silently(db, ids=[1], obj_in={"nope": 1})
+
+
+def test_batch_update_checks_the_rows(db):
+    crud = CRUDBase(Item)
+    (row,) = crud.batch_create(db, objs=[ItemCreate(name="a")])
+    with pytest.raises(ValueError, match="nope"):
+        crud.batch_update(db, objs=[{"id": row.id, "nope": 1}])
+    with pytest.raises(ValueError, match="id"):
+        crud.batch_update(db, objs=[{"qty": 1}])
+    with pytest.raises(StaleDataError):
+        crud.batch_update(db, objs=[{"id": row.id, "qty": 1}, {"id": 999, "qty": 1}])
+
+
+class ItemRename(BaseModel):
+    name: str
+
+
+@pytest.mark.anyio
+# a body that is not an ItemRename is passed on as a plain dict
+@pytest.mark.parametrize("client", [{"update_schema_type": ItemRename}], indirect=True)
+@pytest.mark.parametrize("prefix", ["/sync", "/async"])
+async def test_batch_update_unknown_field_is_400(client, prefix):
+    response = await client.put(
+        f"{prefix}/batch_update_by_ids", params={"ids": [1]}, json={"nope": 1}
+    )
+    assert response.status_code == 400
+    assert "nope" in response.json()["detail"]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("prefix", ["/sync", "/async"])
+async def test_batch_update_errors(client, prefix):
+    await client.post(f"{prefix}/create", json={"name": "a", "rank": 0})
+    response = await client.put(f"{prefix}/batch_update", json=[{"id": 1, "nope": 1}])
+    assert response.status_code == 400 and "nope" in response.json()["detail"]
+    response = await client.put(
+        f"{prefix}/batch_update", json=[{"id": 1, "qty": 2}, {"id": 999, "qty": 2}]
+    )
+    assert response.status_code == 404
@@ -0,0 +1,42 @@
+import pytest
+
+from fastapi_easy_crud.crud.async_crud_base import AsyncCRUDBase
+from fastapi_easy_crud.crud.cache import EntityCache
+from fastapi_easy_crud.crud.crud_base import CRUDBase
+from tests.models import Item, ItemCreate, ItemUpdate
+
+
+def test_batch_get_reads_through_the_cache(db):
+    cache = EntityCache()
+    crud = CRUDBase(Item, cache=cache)
+    ids = [row.id for row in crud.batch_create(db, objs=[ItemCreate(), ItemCreate()])]
+    assert [row.id for row in crud.batch_get(db, ids=ids)] == ids
+    assert cache.stats() == {"hits": 0, "misses": 2}
+    db.expunge_all()
+    assert [row.id for row in crud.batch_get(db, ids=ids + [999])] == ids
+    assert cache.stats() == {"hits": 2, "misses": 3}
+
+
+def test_writes_invalidate_the_cache(db, returning):
+    crud = CRUDBase(Item, cache=EntityCache())
+    a, b = crud.batch_create(db, objs=[ItemCreate(qty=1), ItemCreate(qty=1)])
+    crud.batch_get(db, ids=[a.id, b.id])
+    crud.update_by_id(db, id=a.id, obj_in=ItemUpdate(qty=2))
+    crud.batch_update_by_ids(db, ids=[b.id], obj_in={"qty": 3})
+    db.expunge_all()
+    assert [row.qty for row in crud.batch_get(db, ids=[a.id, b.id])] == [2, 3]
+    crud.remove(db, id=a.id)
+    db.expunge_all()
+    assert crud.get(db, a.id) is None
+
+
+@pytest.mark.anyio
+async def test_async_writes_invalidate_the_cache(async_db):
+    cache = EntityCache()
+    crud = AsyncCRUDBase(Item, cache=cache)
+    row = await crud.create(async_db, obj_in=ItemCreate(rank=0, qty=1))
+    assert (await crud.get(async_db, id=row.id)).qty == 1
+    await crud.update_by_id(async_db, id=row.id, obj_in=ItemUpdate(qty=2))
+    async_db.expunge_all()
+    assert (await crud.get(async_db, id=row.id)).qty == 2
+    assert cache.stats()["misses"] == 2
@@ -0,0 +1,76 @@
+import pytest
+from sqlalchemy import Engine, event
+
+pytestmark = [
+    pytest.mark.anyio,
+    pytest.mark.parametrize("prefix", ["/sync", "/async"]),
+]
+
+
+async def create(client, prefix, **values):
+    response = await client.post(f"{prefix}/create", json={"rank": 0, **values})
+    return response.json()["id"]
+
+
+async def test_etag_changes_with_the_row_content(client, prefix):
+    id = await create(client, prefix, name="a")
+    etag = (await client.get(f"{prefix}/get", params={"id": id})).headers["ETag"]
+    response = await client.get(
+        f"{prefix}/get", params={"id": id}, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    # last_modified_time doesn't change, as within the same second on MySQL
+    await client.put(f"{prefix}/update_by_id", params={"id": id}, json={"name": "b"})
+    response = await client.get(
+        f"{prefix}/get", params={"id": id}, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.json()["name"] == "b" and response.headers["ETag"] != etag
+
+
+async def test_batch_get_etag_of_a_fieldset(client, prefix):
+    id = await create(client, prefix, name="a", qty=1)
+    params = {"ids": [id], "fields": ["name"]}
+    etag = (await client.get(f"{prefix}/batch_get", params=params)).headers["ETag"]
+    # a column outside of the fieldset doesn't change its representation
+    await client.put(f"{prefix}/update_by_id", params={"id": id}, json={"qty": 2})
+    response = await client.get(
+        f"{prefix}/batch_get", params=params, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    await client.put(f"{prefix}/update_by_id", params={"id": id}, json={"name": "b"})
+    response = await client.get(
+        f"{prefix}/batch_get", params=params, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+
+
+async def test_if_none_match_star_needs_a_row(client, prefix):
+    headers = {"If-None-Match": "*"}
+    response = await client.get(
+        f"{prefix}/batch_get", params={"ids": [999]}, headers=headers
+    )
+    assert response.status_code == 200 and response.json() == []
+    id = await create(client, prefix)
+    response = await client.get(
+        f"{prefix}/batch_get", params={"ids": [id, 999]}, headers=headers
+    )
+    assert response.status_code == 304
+
+
+async def test_conditional_get_of_a_changed_row_selects_once(client, prefix):
+    id = await create(client, prefix, name="a", blob="x" * 1000)
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        response = await client.get(
+            f"{prefix}/get", params={"id": id}, headers={"If-None-Match": 'W/"0"'}
+        )
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+    assert response.status_code == 200
+    assert len([s for s in statements if s.startswith("SELECT")]) == 1
@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy import event
+
+from fastapi_easy_crud.crud.async_crud_base import AsyncCRUDBase
+from fastapi_easy_crud.crud.crud_base import CRUDBase
+from fastapi_easy_crud.db.engine import get_engine
+from tests.models import Item, ItemCreate
+
+
+@pytest.fixture
+def inserts(database):
+    """The INSERT statements sent to the database."""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        if statement.startswith("INSERT"):
+            statements.append(statement)
+
+    engine = get_engine()
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def test_create_leaves_a_none_id_to_the_database(db, returning, inserts):
+    row = CRUDBase(Item).create(db, obj_in=ItemCreate(id=None, name="a", rank=1))
+    assert row.id == 1 and row.name == "a" and row.create_time is not None
+    assert "id" not in inserts[0].split("VALUES")[0]
+
+
+@pytest.mark.anyio
+async def test_async_create_leaves_a_none_id_to_the_database(async_db, returning):
+    crud = AsyncCRUDBase(Item)
+    row = await crud.create(async_db, obj_in=ItemCreate(id=None, rank=1))
+    assert row.id == 1 and row.create_time is not None
+    row = await crud.create(async_db, obj_in=ItemCreate(id=7, rank=1))
+    assert row.id == 7
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from fastapi_easy_crud.crud.async_crud_base import AsyncCRUDBase
+from fastapi_easy_crud.crud.dataloader import AsyncGetLoader
+from tests.models import Item, ItemCreate
+
+
+@pytest.mark.anyio
+async def test_concurrent_loads_share_one_batch(async_db):
+    crud = AsyncCRUDBase(Item)
+    rows = await crud.batch_create(async_db, objs=[ItemCreate(rank=0)] * 2)
+    a, b = (row.id for row in rows)
+    loader = AsyncGetLoader(crud)
+    found = await asyncio.gather(*(loader.load(id) for id in [a, b, a, 999, b]))
+    assert [row.id if row else None for row in found] == [a, b, a, None, b]
+    assert loader.stats() == {"loads": 5, "batches": 1}
+
+
+@pytest.mark.anyio
+async def test_max_batch_size_dispatches_early(async_db):
+    loader = AsyncGetLoader(AsyncCRUDBase(Item), window=10, max_batch_size=2)
+    found = await asyncio.wait_for(
+        asyncio.gather(*(loader.load(id) for id in [1, 2])), 1
+    )
+    assert found == [None, None]
+    assert loader.stats()["batches"] == 1
+
+
+@pytest.mark.anyio
+async def test_cancelled_batch_releases_the_waiting_loads(async_db):
+    started = asyncio.Event()
+
+    class BlockingCRUD(AsyncCRUDBase):
+        async def batch_get(self, db, *, ids, fields=None):
+            started.set()
+            await asyncio.sleep(10)
+
+    loader = AsyncGetLoader(BlockingCRUD(Item), window=0)
+    load = asyncio.ensure_future(loader.load(1))
+    await started.wait()
+    state = loader._states[asyncio.get_running_loop()]
+    for task in state.tasks:
+        task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(load, 1)
+    assert not state.futures
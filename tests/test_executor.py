@@ -0,0 +1,17 @@
+import pytest
+
+from fastapi_easy_crud.crud.executor import CRUDExecutor
+from fastapi_easy_crud.db import settings
+
+
+@pytest.mark.anyio
+async def test_run_before_settings_init(monkeypatch):
+    # as if settings.init() was never called
+    for name in ("pool_class", "pool_size", "max_overflow", "max_connections"):
+        monkeypatch.delattr(settings.settings, f"sqlalchemy_{name}", raising=False)
+    monkeypatch.delenv("SQLALCHEMY_MAX_CONNECTIONS", raising=False)
+    monkeypatch.setenv("SQLALCHEMY_POOL_SIZE", "3")
+    monkeypatch.setenv("SQLALCHEMY_MAX_OVERFLOW", "2")
+    executor = CRUDExecutor()
+    assert await executor.run(sum, [1, 2]) == 3
+    assert executor.stats()["max_workers"] == 5
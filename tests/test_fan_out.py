@@ -0,0 +1,71 @@
+import pytest
+
+from fastapi_easy_crud.crud import async_crud_base
+from fastapi_easy_crud.crud.async_crud_base import AsyncCRUDBase
+from fastapi_easy_crud.db.transaction import async_transaction
+from tests.models import Item, ItemCreate
+
+
+@pytest.fixture
+async def read_db(async_db):
+    """A session that didn't write, so batch_get may fan out."""
+    from fastapi_easy_crud.db.async_db_deps import get_async_session_maker
+
+    await AsyncCRUDBase(Item).batch_create(
+        async_db, objs=[ItemCreate(name=f"n{i}", rank=i) for i in range(5)]
+    )
+    async with get_async_session_maker()() as session:
+        yield session
+
+
+@pytest.fixture
+def chunk_sessions(monkeypatch):
+    """Number of per-chunk sessions opened by the fan-out."""
+    opened = [0]
+    chunk_session = async_crud_base._chunk_session
+
+    def counting(db):
+        opened[0] += 1
+        return chunk_session(db)
+
+    monkeypatch.setattr(async_crud_base, "_chunk_session", counting)
+    return opened
+
+
+def crud():
+    return AsyncCRUDBase(Item, batch_size=2, max_concurrency=2)
+
+
+@pytest.mark.anyio
+async def test_fan_out_keeps_the_order_of_ids(read_db, chunk_sessions):
+    rows = await crud().batch_get(read_db, ids=[5, 1, 3, 1, 999, 2, 4, 5])
+    assert [row.id for row in rows] == [5, 1, 3, 2, 4]
+    assert [row.rank for row in rows] == [4, 0, 2, 1, 3]
+    # 6 unique ids, 2 per chunk
+    assert chunk_sessions[0] == 3
+    assert all(row in read_db for row in rows)
+
+
+@pytest.mark.anyio
+async def test_fan_out_refreshes_loaded_instances(read_db, chunk_sessions):
+    (loaded,) = await crud().batch_get(read_db, ids=[1])
+    rows = await crud().batch_get(read_db, ids=[1, 2, 3])
+    assert rows[0] is loaded
+    assert chunk_sessions[0] == 2
+
+
+@pytest.mark.anyio
+async def test_no_fan_out_in_a_transaction(read_db, chunk_sessions):
+    async with async_transaction(read_db):
+        rows = await crud().batch_get(read_db, ids=[4, 3, 2, 1, 4])
+        assert [row.id for row in rows] == [4, 3, 2, 1]
+    assert chunk_sessions[0] == 0
+
+
+@pytest.mark.anyio
+async def test_no_fan_out_with_pending_changes(read_db, chunk_sessions):
+    (row,) = await crud().batch_get(read_db, ids=[1])
+    row.name = "changed"
+    rows = await crud().batch_get(read_db, ids=[1, 2, 3])
+    assert [row.id for row in rows] == [1, 2, 3] and rows[0].name == "changed"
+    assert chunk_sessions[0] == 0
@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import inspect
+
+from fastapi_easy_crud.crud.async_crud_base import AsyncCRUDBase
+from fastapi_easy_crud.crud.crud_base import CRUDBase
+from tests.models import Item, ItemCreate
+
+
+def test_fields_load_only_those_columns(db):
+    crud = CRUDBase(Item)
+    (row,) = crud.batch_create(db, objs=[ItemCreate(name="a", blob="x" * 100)])
+    db.expunge_all()
+    for loaded in (
+        crud.get(db, row.id, fields=["name"]),
+        crud.batch_get(db, ids=[row.id], fields=["name"])[0],
+        crud.get_multi(db, fields=["name"])[0],
+    ):
+        assert "blob" in inspect(loaded).unloaded
+        assert "name" not in inspect(loaded).unloaded
+        db.expunge_all()
+
+
+def test_unknown_field_is_rejected(db):
+    with pytest.raises(ValueError, match="nope"):
+        CRUDBase(Item).get_multi(db, fields=["nope"])
+
+
+@pytest.mark.anyio
+async def test_async_fields_load_only_those_columns(async_db):
+    crud = AsyncCRUDBase(Item)
+    (row,) = await crud.batch_create(async_db, objs=[ItemCreate(name="a", rank=0)])
+    async_db.expunge_all()
+    loaded = await crud.get(async_db, id=row.id, fields=["name"])
+    assert "blob" in inspect(loaded).unloaded and loaded.name == "a"
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("prefix", ["/sync", "/async"])
+async def test_routes_return_the_fieldset(client, prefix):
+    await client.post(f"{prefix}/create", json={"name": "a", "rank": 1, "qty": 2})
+    params = {"fields": ["name", "qty"]}
+    response = await client.get(f"{prefix}/get", params={"id": 1, **params})
+    assert response.json() == {"name": "a", "qty": 2}
+    response = await client.get(f"{prefix}/batch_get", params={"ids": [1], **params})
+    assert response.json() == [{"name": "a", "qty": 2}]
+    response = await client.get(f"{prefix}/all", params=params)
+    assert response.json() == [{"name": "a", "qty": 2}]
+    response = await client.get(f"{prefix}/all", params={"fields": ["nope"]})
+    assert response.status_code == 400
@@ -0,0 +1,116 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from loguru import logger
+
+from fastapi_easy_crud.crud.async_crud_base import AsyncCRUDBase
+from fastapi_easy_crud.crud.crud_base import CRUDBase
+from fastapi_easy_crud.db import settings
+from fastapi_easy_crud.db.engine import dispose_engines
+from fastapi_easy_crud.fastapi.metrics import MetricsRegistry
+from fastapi_easy_crud.fastapi.middlewares import BasicLogMetricsMiddleWare
+from tests.conftest import sqlite_url
+from tests.models import Item, ItemCreate
+
+
+def make_client(app=None, **options):
+    app = app or FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return "pong"
+
+    app.add_middleware(BasicLogMetricsMiddleWare, registry=MetricsRegistry(), **options)
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+@pytest.mark.anyio
+async def test_metrics_are_not_exposed_by_default():
+    async with make_client() as client:
+        response = await client.get("/ping")
+        assert response.json() == "pong" and response.headers["X-Request-Id"]
+        assert (await client.get("/metrics")).status_code == 404
+
+
+@pytest.mark.anyio
+async def test_metrics_path_renders_the_registry():
+    async with make_client(metrics_path="/metrics") as client:
+        await client.get("/ping")
+        response = await client.get("/metrics")
+        assert response.status_code == 200
+        assert 'route="/ping"' in response.text
+
+
+@pytest.fixture
+def warnings():
+    messages = []
+    sink = logger.add(messages.append, level="WARNING", format="{message}")
+    yield messages
+    logger.remove(sink)
+
+
+def make_db_client(**options):
+    from fastapi_easy_crud.db.async_db_deps import get_async_session_maker
+    from fastapi_easy_crud.db.session import SessionLocal
+
+    crud, async_crud = CRUDBase(Item, batch_size=1), AsyncCRUDBase(Item)
+    app = FastAPI()
+
+    @app.get("/singles")
+    def singles():
+        with SessionLocal() as db:
+            return [crud.get(db, id).id for id in range(1, 7)]
+
+    @app.get("/batch")
+    def batch():
+        with SessionLocal() as db:
+            return [item.id for item in crud.batch_get(db, ids=list(range(1, 7)))]
+
+    @app.get("/stream")
+    def stream():
+        with SessionLocal() as db:
+            return [item.id for item in crud.iter_multi(db, yield_per=2)]
+
+    @app.get("/async_stream")
+    async def async_stream():
+        async with get_async_session_maker()() as db:
+            return [item.id async for item in async_crud.iter_multi(db, yield_per=2)]
+
+    return make_client(app=app, **options)
+
+
+@pytest.fixture
+def items(database, db):
+    settings.settings.sqlalchemy_engine = sqlite_url(database, "sqlite+aiosqlite")
+    CRUDBase(Item).batch_create_silently(
+        db, objs=[ItemCreate(name=f"n{i}", rank=i) for i in range(6)]
+    )
+    yield
+    asyncio.run(dispose_engines())
+
+
+@pytest.mark.anyio
+async def test_repeated_get_is_a_suspected_n_plus_one(items, warnings):
+    async with make_db_client(n_plus_one_threshold=5) as client:
+        assert (await client.get("/singles")).json() == [1, 2, 3, 4, 5, 6]
+    assert any("suspected N+1: 6 runs" in message for message in warnings)
+
+
+@pytest.mark.anyio
+async def test_batch_chunks_are_not_an_n_plus_one(items, warnings):
+    async with make_db_client(n_plus_one_threshold=5) as client:
+        assert (await client.get("/batch")).json() == [1, 2, 3, 4, 5, 6]
+    assert not any("N+1" in message for message in warnings)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("path", ["/stream", "/async_stream"])
+async def test_streamed_slow_query_is_explained(items, warnings, path):
+    async with make_db_client(
+        slow_query_threshold=0, explain_slow_queries=True
+    ) as client:
+        assert (await client.get(path)).json() == [1, 2, 3, 4, 5, 6]
+    assert any("plan of the" in m and "SCAN" in m for m in warnings)
@@ -0,0 +1,46 @@
+import pytest
+
+from fastapi_easy_crud.crud.crud_base import CRUDBase
+from fastapi_easy_crud.crud.pagination import encode_cursor
+from tests.models import Item, ItemCreate
+
+
+def test_cursor_pages_cover_every_row_once(db):
+    crud = CRUDBase(Item)
+    crud.batch_create_silently(
+        db, objs=[ItemCreate(name=f"n{i}", rank=i % 3) for i in range(10)]
+    )
+    seen, cursor = [], None
+    while True:
+        rows, cursor = crud.get_multi_by_cursor(
+            db, cursor=cursor, limit=4, order_by="-rank"
+        )
+        seen.extend((row.rank, row.id) for row in rows)
+        if cursor is None:
+            break
+    assert len(seen) == 10
+    assert seen == sorted(seen, key=lambda key: (-key[0], -key[1]))
+
+
+def test_nullable_order_by_is_rejected(db):
+    crud = CRUDBase(Item)
+    with pytest.raises(ValueError, match="nullable"):
+        crud.get_multi_by_cursor(db, order_by="name")
+
+
+@pytest.mark.parametrize("last_id", [{"a": 1}, [1], "x"])
+def test_tampered_cursor_id_is_rejected(db, last_id):
+    with pytest.raises(ValueError, match="invalid cursor"):
+        CRUDBase(Item).get_multi_by_cursor(
+            db, cursor=encode_cursor([0, last_id]), order_by="rank"
+        )
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("prefix", ["/sync", "/async"])
+async def test_tampered_cursor_is_400(client, prefix):
+    response = await client.get(
+        f"{prefix}/page",
+        params={"cursor": encode_cursor([0, {"a": 1}]), "order_by": "rank"},
+    )
+    assert response.status_code == 400
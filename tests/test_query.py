@@ -0,0 +1,72 @@
+import pytest
+from loguru import logger
+
+from fastapi_easy_crud.crud.async_crud_base import AsyncCRUDBase
+from fastapi_easy_crud.crud.crud_base import CRUDBase
+from fastapi_easy_crud.crud.query import QuerySpec, compile_query_spec
+from tests.models import Item, ItemCreate
+
+
+def test_parse():
+    spec = QuerySpec.parse(["name:eq:a:b", "id:in:1,2"], ["-rank,id"])
+    assert [(f.field, f.op, f.value) for f in spec.filters] == [
+        ("name", "eq", "a:b"),
+        ("id", "in", ["1", "2"]),
+    ]
+    assert [(s.field, s.descending) for s in spec.sort] == [
+        ("rank", True),
+        ("id", False),
+    ]
+    with pytest.raises(ValueError, match="invalid filter"):
+        QuerySpec.parse(["name:contains:a"])
+
+
+def test_only_allowed_fields_compile():
+    spec = QuerySpec.parse(["qty:eq:1"])
+    with pytest.raises(ValueError, match="qty is not a filterable field"):
+        compile_query_spec(Item, spec, CRUDBase(Item).filterable_fields)
+    with pytest.raises(ValueError):
+        compile_query_spec(Item, QuerySpec.parse(["rank:gt:x"]), frozenset({"rank"}))
+
+
+def test_get_multi_filters_and_sorts(db):
+    crud = CRUDBase(Item)
+    crud.batch_create(db, objs=[ItemCreate(name=f"n{i}", rank=i % 3) for i in range(6)])
+    spec = QuerySpec.parse(["rank:gte:1", "name:like:n%"], ["-rank", "-id"])
+    rows = crud.get_multi(db, spec=spec)
+    assert [(row.rank, row.id) for row in rows] == [(2, 6), (2, 3), (1, 5), (1, 2)]
+    spec = QuerySpec.parse(["id:in:1,4", "rank:ne:1"])
+    assert [row.id for row in crud.get_multi(db, spec=spec)] == [1, 4]
+
+
+def test_unindexed_filterable_field_warns():
+    messages = []
+    sink = logger.add(messages.append, level="WARNING", format="{message}")
+    try:
+        crud = CRUDBase(Item, filterable_fields=["rank", "qty"])
+        assert crud.filterable_fields == {"rank", "qty"}
+    finally:
+        logger.remove(sink)
+    assert len(messages) == 1 and "qty has no index" in messages[0]
+
+
+@pytest.mark.anyio
+async def test_async_get_multi_filters(async_db):
+    crud = AsyncCRUDBase(Item)
+    await crud.batch_create(async_db, objs=[ItemCreate(rank=i) for i in range(3)])
+    rows = await crud.get_multi(async_db, spec=QuerySpec.parse(["rank:lt:2"], ["-id"]))
+    assert [row.rank for row in rows] == [1, 0]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("prefix", ["/sync", "/async"])
+async def test_all_route_filters(client, prefix):
+    for rank in (3, 1, 2):
+        await client.post(f"{prefix}/create", json={"rank": rank})
+    response = await client.get(
+        f"{prefix}/all", params={"filter": "rank:gte:2", "sort": "-rank"}
+    )
+    assert [row["rank"] for row in response.json()] == [3, 2]
+    for params in ({"filter": "qty:eq:1"}, {"filter": "rank"}, {"sort": "blob"}):
+        response = await client.get(f"{prefix}/all", params=params)
+        assert response.status_code == 400
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from fastapi_easy_crud.crud.async_crud_base import AsyncCRUDBase
+from fastapi_easy_crud.crud.crud_base import CRUDBase
+from fastapi_easy_crud.db import settings
+from fastapi_easy_crud.db.db_base import CommonBase
+from fastapi_easy_crud.db.engine import dispose_engines, get_engine
+from fastapi_easy_crud.db.routing import RoutingSession
+from tests.conftest import sqlite_url
+from tests.models import Item, ItemCreate, ItemUpdate
+
+
+@pytest.fixture
+def replica(tmp_path):
+    """A primary and a replica that never catches up, both empty at first."""
+    replica_path = tmp_path / "replica"
+    replica_path.mkdir()
+    settings.init(
+        sqlite_url(tmp_path),
+        "pw",
+        sqlalchemy_replica_engines=[sqlite_url(replica_path)],
+    )
+    for name in ("primary", "replica-0"):
+        CommonBase.metadata.create_all(get_engine(name))
+    yield replica_path
+    asyncio.run(dispose_engines())
+
+
+def test_reads_go_to_the_replica(replica):
+    from fastapi_easy_crud.db.session import SessionLocal
+
+    crud = CRUDBase(Item)
+    with SessionLocal() as db:
+        assert isinstance(db, RoutingSession)
+        crud.batch_create_silently(db, objs=[ItemCreate(rank=1)])
+    with SessionLocal() as db:
+        assert crud.get_multi(db) == []
+
+
+def test_writes_read_back_from_the_primary(replica, returning):
+    from fastapi_easy_crud.db.session import SessionLocal
+
+    crud = CRUDBase(Item)
+    with SessionLocal() as db:
+        row = crud.create(db, obj_in=ItemCreate(name="a", rank=1))
+        assert row.create_time is not None
+    with SessionLocal() as db:
+        row = crud.update_by_id(db, id=row.id, obj_in=ItemUpdate(name="b"))
+        assert row.name == "b"
+
+
+@pytest.mark.anyio
+async def test_async_writes_read_back_from_the_primary(replica, returning):
+    from fastapi_easy_crud.db.async_db_deps import get_async_session_maker
+
+    settings.settings.sqlalchemy_engine = sqlite_url(replica.parent, "sqlite+aiosqlite")
+    settings.settings.sqlalchemy_replica_engines = [
+        sqlite_url(replica, "sqlite+aiosqlite")
+    ]
+    crud = AsyncCRUDBase(Item)
+    async with get_async_session_maker()() as db:
+        row = await crud.create(db, obj_in=ItemCreate(name="a", rank=1))
+        row = await crud.update_by_id(db, id=row.id, obj_in=ItemUpdate(name="b"))
+        assert row.name == "b"
+    await dispose_engines()
@@ -0,0 +1,64 @@
+import pytest
+
+from fastapi_easy_crud.crud import rows
+from fastapi_easy_crud.crud.async_crud_base import AsyncCRUDBase
+from fastapi_easy_crud.crud.crud_base import CRUDBase
+from fastapi_easy_crud.crud.rows import LightRow, row_class, row_columns
+from tests.models import Item, ItemCreate
+
+
+@pytest.fixture
+def light_rows(monkeypatch):
+    """Generate LightRow classes even when msgspec is installed."""
+    monkeypatch.setattr(rows, "msgspec", None)
+    row_class.cache_clear()
+    yield
+    row_class.cache_clear()
+
+
+def test_row_columns_keep_the_primary_key():
+    assert row_columns(Item, frozenset({"name"})) == ["name", "id"]
+    with pytest.raises(ValueError, match="nope"):
+        row_columns(Item, frozenset({"nope"}))
+
+
+def test_light_row_class(light_rows):
+    cls = row_class(Item, frozenset({"name"}))
+    assert issubclass(cls, LightRow) and cls is row_class(Item, frozenset({"name"}))
+    row = cls("a", 1)
+    assert (row.name, row.id) == ("a", 1) and not hasattr(row, "__dict__")
+    assert row == cls("a", 1) and row != cls("b", 1)
+    assert repr(row) == "ItemRow(name='a', id=1)"
+
+
+def test_rows_bypass_the_identity_map(db, light_rows):
+    crud = CRUDBase(Item)
+    crud.batch_create(db, objs=[ItemCreate(name=f"n{i}", rank=i) for i in range(3)])
+    db.expunge_all()
+    found = crud.get_multi_rows(db, fields=["rank"])
+    assert [(row.id, row.rank) for row in found] == [(1, 0), (2, 1), (3, 2)]
+    found = crud.batch_get_rows(db, ids=[3, 1, 3, 999])
+    assert [(row.id, row.name) for row in found] == [(3, "n2"), (1, "n0")]
+    assert len(db.identity_map) == 0
+
+
+@pytest.mark.anyio
+async def test_async_rows(async_db, light_rows):
+    crud = AsyncCRUDBase(Item, batch_size=1)
+    await crud.batch_create(async_db, objs=[ItemCreate(rank=i) for i in range(3)])
+    found = await crud.batch_get_rows(async_db, ids=[2, 1], fields=["rank"])
+    assert [(row.id, row.rank) for row in found] == [(2, 1), (1, 0)]
+    assert [row.id for row in await crud.get_multi_rows(async_db)] == [1, 2, 3]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("client", [{"lightweight_reads": True}], indirect=True)
+@pytest.mark.parametrize("prefix", ["/sync", "/async"])
+async def test_lightweight_read_routes(client, prefix):
+    await client.post(f"{prefix}/create", json={"name": "a", "rank": 1})
+    response = await client.get(f"{prefix}/all")
+    assert [(row["id"], row["name"]) for row in response.json()] == [(1, "a")]
+    response = await client.get(
+        f"{prefix}/batch_get", params={"ids": [1], "fields": ["rank"]}
+    )
+    assert response.json() == [{"rank": 1}]
@@ -0,0 +1,58 @@
+from typing import Optional
+
+from fastapi import FastAPI
+from fastapi.security import HTTPBearer
+from pydantic import BaseModel
+
+from fastapi_easy_crud.fastapi.secure_openapi import (ROUTES_HASH,
+                                                      add_secure_setting,
+                                                      dump_openapi)
+
+
+class Thing(BaseModel):
+    name: str
+
+
+class WiderThing(BaseModel):
+    name: str
+    size: Optional[int] = None
+
+
+def make_app(model=Thing, **options):
+    app = FastAPI()
+
+    @app.post("/things")
+    async def create(thing: model) -> model:  # type: ignore
+        return thing
+
+    add_secure_setting(app, [HTTPBearer()], **options)
+    return app
+
+
+def test_dumped_schema_is_loaded_for_the_same_routes(tmp_path):
+    path = str(tmp_path / "openapi.json")
+    dump_openapi(make_app(), path)
+    app = make_app(schema_path=path)
+    assert app.openapi_schema[ROUTES_HASH]
+    assert "HTTPBearer" in app.openapi_schema["components"]["securitySchemes"]
+
+
+def test_dumped_schema_of_other_models_is_regenerated(tmp_path):
+    path = str(tmp_path / "openapi.json")
+    dump_openapi(make_app(), path)
+    app = make_app(WiderThing, schema_path=path)
+    assert ROUTES_HASH not in app.openapi_schema
+    assert (
+        "size"
+        in app.openapi_schema["components"]["schemas"]["WiderThing"]["properties"]
+    )
+
+
+def test_routes_added_later_are_in_the_schema():
+    app = make_app(lazy=True)
+
+    @app.get("/late")
+    async def late() -> str:
+        return ""
+
+    assert set(app.openapi()["paths"]) == {"/things", "/late"}
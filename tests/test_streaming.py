@@ -0,0 +1,78 @@
+import json
+import zlib
+
+import pytest
+
+from fastapi_easy_crud.crud.streaming import (Compressor, RowEncoder,
+                                              iter_batches, negotiate_encoding)
+from tests.models import ItemGet
+
+ROWS = [{"id": i, "name": f"n{i}"} for i in range(5)]
+
+
+def encode(output_format, size):
+    encoder = RowEncoder(ItemGet, output_format)
+    body = b"".join(encoder.encode(batch) for batch in iter_batches(ROWS, size))
+    return body + encoder.close()
+
+
+@pytest.mark.parametrize("size", [1, 2, 10])
+def test_json_batches_make_one_array(size):
+    assert [row["id"] for row in json.loads(encode("json", size))] == [0, 1, 2, 3, 4]
+    assert RowEncoder(ItemGet).close() == b"[]"
+
+
+def test_ndjson_is_one_row_per_line():
+    lines = encode("ndjson", 2).splitlines()
+    assert [json.loads(line)["name"] for line in lines] == [r["name"] for r in ROWS]
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError, match="unsupported format"):
+        RowEncoder(ItemGet, "xml")
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [("gzip, deflate", "gzip"), ("*", "gzip"), ("gzip;q=0", None), ("br", None)],
+)
+def test_negotiate_encoding(accept, expected):
+    assert negotiate_encoding(accept) == expected
+
+
+def test_gzip_chunks_decode_as_they_arrive():
+    compressor = Compressor("gzip")
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    assert decompressor.decompress(compressor.compress(b"abc")) == b"abc"
+    assert decompressor.decompress(compressor.compress(b"def")) == b"def"
+    decompressor.decompress(compressor.flush())
+    assert decompressor.eof
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("prefix", ["/sync", "/async"])
+async def test_streamed_routes_match_the_plain_ones(client, prefix):
+    for rank in range(3):
+        await client.post(f"{prefix}/create", json={"name": f"n{rank}", "rank": rank})
+    for path, params in (("all", {}), ("batch_get", {"ids": [3, 1, 2]})):
+        plain = await client.get(f"{prefix}/{path}", params=params)
+        streamed = await client.get(
+            f"{prefix}/{path}",
+            params={**params, "stream": True},
+            headers={"Accept-Encoding": "gzip"},
+        )
+        assert streamed.headers["Content-Encoding"] == "gzip"
+        assert streamed.json() == plain.json()
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("prefix", ["/sync", "/async"])
+async def test_ndjson_route(client, prefix):
+    await client.post(f"{prefix}/create", json={"name": "a", "rank": 0})
+    response = await client.get(
+        f"{prefix}/all", params={"format": "ndjson", "fields": ["name"]}
+    )
+    assert response.headers["Content-Type"] == "application/x-ndjson"
+    assert response.text == '{"name":"a"}\n'
+    response = await client.get(f"{prefix}/all", params={"format": "xml"})
+    assert response.status_code == 400
@@ -0,0 +1,112 @@
+import subprocess
+import sys
+
+import pytest
+
+from fastapi_easy_crud.crud.async_crud_base import AsyncCRUDBase
+from fastapi_easy_crud.crud.cache import EntityCache
+from fastapi_easy_crud.crud.crud_base import CRUDBase
+from fastapi_easy_crud.db.transaction import async_transaction, transaction
+from tests.models import Item, ItemCreate, ItemUpdate
+
+
+def test_transaction_commits_once_at_the_end(db):
+    crud = CRUDBase(Item)
+    with transaction(db):
+        a = crud.create(db, obj_in=ItemCreate(rank=1))
+        crud.update_by_id(db, id=a.id, obj_in=ItemUpdate(qty=2))
+        assert db.in_transaction()
+    db.expunge_all()
+    assert crud.get(db, a.id).qty == 2
+
+
+def test_transaction_rolls_back_on_error(db):
+    crud = CRUDBase(Item)
+    with pytest.raises(RuntimeError):
+        with transaction(db):
+            crud.batch_create(db, objs=[ItemCreate(rank=1), ItemCreate(rank=2)])
+            raise RuntimeError
+    assert crud.get_multi(db) == []
+
+
+def test_savepoint_rolls_back_the_inner_scope_only(db):
+    crud = CRUDBase(Item)
+    with transaction(db):
+        crud.create(db, obj_in=ItemCreate(rank=1))
+        with pytest.raises(RuntimeError):
+            with transaction(db, savepoint=True):
+                crud.create(db, obj_in=ItemCreate(rank=2))
+                raise RuntimeError
+    assert [row.rank for row in crud.get_multi(db)] == [1]
+
+
+def test_cache_invalidation_waits_for_the_commit(db):
+    cache = EntityCache()
+    crud = CRUDBase(Item, cache=cache)
+    a = crud.create(db, obj_in=ItemCreate(rank=1, qty=1))
+    crud.batch_get(db, ids=[a.id])
+    with transaction(db):
+        crud.batch_update_by_ids(db, ids=[a.id], obj_in={"qty": 2})
+        assert cache.get_many(Item, [a.id])
+    assert not cache.get_many(Item, [a.id])
+
+
+def test_rolled_back_write_does_not_reach_the_cache(database, returning):
+    from fastapi_easy_crud.db.session import SessionLocal
+
+    crud = CRUDBase(Item, cache=EntityCache())
+    with SessionLocal() as db:
+        id = crud.create(db, obj_in=ItemCreate(rank=1, qty=1)).id
+        with pytest.raises(RuntimeError):
+            with transaction(db):
+                crud.update_by_id(db, id=id, obj_in=ItemUpdate(qty=2))
+                crud.get(db, id)
+                raise RuntimeError
+    with SessionLocal() as other:
+        assert crud.get(other, id).qty == 1
+
+
+def test_transaction_reads_its_own_writes(db, returning):
+    crud = CRUDBase(Item, cache=EntityCache())
+    a = crud.create(db, obj_in=ItemCreate(rank=1, qty=1))
+    crud.get(db, a.id)
+    with transaction(db):
+        crud.update_by_id(db, id=a.id, obj_in=ItemUpdate(qty=2))
+        assert crud.get(db, a.id).qty == 2
+        assert [row.qty for row in crud.batch_get(db, ids=[a.id])] == [2]
+
+
+@pytest.mark.anyio
+async def test_async_rolled_back_write_does_not_reach_the_cache(async_db):
+    cache = EntityCache()
+    crud = AsyncCRUDBase(Item, cache=cache)
+    a = await crud.create(async_db, obj_in=ItemCreate(rank=1, qty=1))
+    await crud.get(async_db, id=a.id)
+    with pytest.raises(RuntimeError):
+        async with async_transaction(async_db):
+            await crud.update_by_id(async_db, id=a.id, obj_in=ItemUpdate(qty=2))
+            assert (await crud.get(async_db, id=a.id)).qty == 2
+            raise RuntimeError
+    assert not cache.get_many(Item, [a.id])
+    async_db.expunge_all()
+    assert (await crud.get(async_db, id=a.id)).qty == 1
+
+
+@pytest.mark.anyio
+async def test_async_transaction_rolls_back_on_error(async_db):
+    crud = AsyncCRUDBase(Item)
+    with pytest.raises(RuntimeError):
+        async with async_transaction(async_db):
+            await crud.create(async_db, obj_in=ItemCreate(rank=1))
+            raise RuntimeError
+    async with async_transaction(async_db):
+        await crud.create(async_db, obj_in=ItemCreate(rank=2))
+    assert [row.rank for row in await crud.get_multi(async_db)] == [2]
+
+
+def test_sync_imports_do_not_load_asyncio_extension():
+    code = (
+        "import sys, fastapi_easy_crud.db.transaction, fastapi_easy_crud.crud.crud_base;"
+        "sys.exit('sqlalchemy.ext.asyncio' in sys.modules)"
+    )
+    assert subprocess.run([sys.executable, "-c", code]).returncode == 0
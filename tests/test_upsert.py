@@ -0,0 +1,83 @@
+import pytest
+
+from fastapi_easy_crud.crud.async_crud_base import AsyncCRUDBase
+from fastapi_easy_crud.crud.crud_base import CRUDBase
+from tests.models import Item, ItemCreate
+
+
+def test_batch_upsert_inserts_and_updates(db, returning):
+    crud = CRUDBase(Item)
+    crud.batch_create(db, objs=[ItemCreate(id=1, name="a", rank=1, qty=1)])
+    rows = crud.batch_upsert(
+        db,
+        objs=[ItemCreate(id=1, name="b"), ItemCreate(id=2, name="c", rank=2)],
+        returning=True,
+    )
+    assert sorted(row.id for row in rows) == [1, 2]
+    db.expunge_all()
+    a, c = crud.batch_get(db, ids=[1, 2])
+    # columns the objects don't set are kept
+    assert (a.name, a.rank, a.qty) == ("b", 1, 1)
+    assert (c.name, c.rank) == ("c", 2)
+
+
+def test_batch_upsert_rejects_unknown_columns(db):
+    with pytest.raises(ValueError, match="nope"):
+        CRUDBase(Item).batch_upsert(db, objs=[{"id": 1, "nope": 1}])
+
+
+def test_batch_upsert_conflict_keys_must_be_unique(db):
+    with pytest.raises(ValueError, match="unique key"):
+        CRUDBase(Item).batch_upsert(db, objs=[{"name": "a"}], conflict_keys=["name"])
+
+
+def test_batch_upsert_returning_needs_the_conflict_keys(db, returning):
+    crud = CRUDBase(Item)
+    if returning == "returning":
+        (row,) = crud.batch_upsert(db, objs=[ItemCreate(name="a")], returning=True)
+        assert row.name == "a"
+    else:
+        with pytest.raises(ValueError, match="id"):
+            crud.batch_upsert(db, objs=[ItemCreate(name="a")], returning=True)
+        assert crud.get_multi(db) == []
+
+
+@pytest.mark.anyio
+async def test_async_batch_upsert_update_columns(async_db, returning):
+    crud = AsyncCRUDBase(Item)
+    await crud.batch_create(async_db, objs=[ItemCreate(id=1, name="a", rank=0)])
+    await crud.batch_upsert(
+        async_db,
+        objs=[ItemCreate(id=1, name="b", qty=3)],
+        update_columns=["qty"],
+    )
+    async_db.expunge_all()
+    (row,) = await crud.batch_get(async_db, ids=[1])
+    assert (row.name, row.qty) == ("a", 3)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("prefix", ["/sync", "/async"])
+async def test_batch_upsert_route_validates_the_body(client, prefix):
+    response = await client.post(
+        f"{prefix}/batch_upsert", json=[{"id": 1, "rank": "high"}]
+    )
+    assert response.status_code == 422
+    response = await client.post(
+        f"{prefix}/batch_upsert",
+        params={"returning": True},
+        json=[{"id": 1, "name": "a", "rank": 1}, {"id": 1, "qty": 2}],
+    )
+    assert response.status_code == 200
+    assert response.json()[0]["name"] == "a" and response.json()[0]["qty"] == 2
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("prefix", ["/sync", "/async"])
+async def test_batch_upsert_route_rejects_non_unique_conflict_keys(client, prefix):
+    response = await client.post(
+        f"{prefix}/batch_upsert",
+        params={"conflict_keys": ["name"]},
+        json=[{"name": "a", "rank": 1}],
+    )
+    assert response.status_code == 400 and "unique key" in response.json()["detail"]
@@ -0,0 +1,21 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field
+
+from fastapi_easy_crud.crud.utils import encode_model
+
+
+class Aliased(BaseModel):
+    name: Optional[str] = Field(None, alias="item_name")
+    at: Optional[datetime] = None
+
+
+def test_encode_model_matches_jsonable_encoder():
+    for obj_in in (Aliased(item_name="x", at=datetime(2024, 1, 2)), Aliased()):
+        assert encode_model(obj_in) == jsonable_encoder(obj_in)
+        assert encode_model(obj_in, exclude_unset=True) == jsonable_encoder(
+            obj_in, exclude_unset=True
+        )
+    assert encode_model(Aliased(item_name="x")) == {"item_name": "x", "at": None}
@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy import event
+
+from fastapi_easy_crud.crud.async_crud_base import AsyncCRUDBase
+from fastapi_easy_crud.crud.conditional import row_versions, version_columns
+from fastapi_easy_crud.crud.crud_base import CRUDBase
+from fastapi_easy_crud.db.engine import get_engine
+from tests.models import Item, ItemCreate
+
+
+@pytest.fixture
+def selects(database):
+    """Number of SELECT statements sent to the database."""
+    count = [0]
+
+    def record(conn, cursor, statement, *args):
+        count[0] += statement.startswith("SELECT")
+
+    event.listen(get_engine(), "before_cursor_execute", record)
+    yield count
+    event.remove(get_engine(), "before_cursor_execute", record)
+
+
+def test_get_versions_by_chunks(db, selects):
+    crud = CRUDBase(Item, batch_size=2)
+    rows = crud.batch_create(db, objs=[ItemCreate(rank=i) for i in range(5)])
+    ids = [row.id for row in rows]
+    selects[0] = 0
+    versions = crud.get_versions(db, ids=ids + ids[:2] + [999], fields=["rank"])
+    assert selects[0] == 3
+    assert versions == row_versions(rows, version_columns(Item, ["rank"]))
+
+
+@pytest.mark.anyio
+async def test_async_get_versions_by_chunks(async_db):
+    crud = AsyncCRUDBase(Item, batch_size=2)
+    rows = await crud.batch_create(async_db, objs=[ItemCreate(rank=0)] * 3)
+    ids = [row.id for row in rows]
+    versions = await crud.get_versions(async_db, ids=ids + ids)
+    assert versions == row_versions(rows, version_columns(Item, None))
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from fastapi_easy_crud.crud.async_crud_base import AsyncCRUDBase
+from fastapi_easy_crud.crud.write_behind import AsyncWriteBehind
+from tests.models import Item, ItemCreate
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_rows_are_flushed_in_batches(async_db):
+    crud = AsyncCRUDBase(Item)
+    queue = AsyncWriteBehind(crud, flush_size=3)
+    queue.start()
+    await queue.enqueue([ItemCreate(rank=i) for i in range(4)])
+    await queue.enqueue([ItemCreate(name="a")])
+    await queue.stop()
+    assert queue.stats() == {
+        "queued": 5,
+        "rejected": 0,
+        "flushed": 5,
+        "failed": 0,
+        "flushes": 2,
+        "pending": 0,
+    }
+    rows = await crud.get_multi(async_db)
+    assert sorted(row.rank for row in rows) == [0, 0, 1, 2, 3]
+
+
+async def test_enqueue_needs_a_running_queue(async_db):
+    queue = AsyncWriteBehind(AsyncCRUDBase(Item))
+    with pytest.raises(RuntimeError):
+        await queue.enqueue([ItemCreate()])
+
+
+async def test_a_full_queue_rejects_rows(async_db):
+    queue = AsyncWriteBehind(
+        AsyncCRUDBase(Item), max_queue_size=2, flush_interval=10, enqueue_timeout=0
+    )
+    queue.start()
+    await queue.enqueue([ItemCreate(rank=0)] * 2)
+    with pytest.raises(asyncio.QueueFull):
+        await queue.enqueue([ItemCreate(rank=0)])
+    await queue.stop()
+    assert queue.stats()["rejected"] == 1 and queue.stats()["flushed"] == 2
+
+
+async def test_failed_flushes_are_dropped(async_db):
+    def session_maker():
+        raise ConnectionError
+
+    queue = AsyncWriteBehind(AsyncCRUDBase(Item), session_maker=session_maker)
+    queue.start()
+    await queue.enqueue([ItemCreate(rank=0)])
+    await queue.stop()
+    assert queue.stats()["failed"] == 1 and queue.stats()["pending"] == 0